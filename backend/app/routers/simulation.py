@@ -102,7 +102,8 @@ async def get_game_state(db: AsyncSession = Depends(get_db)):
     if not player:
         raise HTTPException(status_code=404, detail="No player company found. Start a new game!")
     
-    cash_balance = await engine.accounting.get_company_cash(player.id)
+    cashes = await engine.accounting.get_company_cashes([c.id for c in companies])
+    cash_balance = cashes[player.id]
     
     # Prepare enhanced company responses
     from core.bot_ai import BotAI
@@ -111,7 +112,7 @@ async def get_game_state(db: AsyncSession = Depends(get_db)):
     company_responses = []
     for c in companies:
         # Get cash for each company
-        c_cash = await engine.accounting.get_company_cash(c.id)
+        c_cash = cashes[c.id]
         
         # Get personality
         personality = "Player"
@@ -173,6 +174,7 @@ async def purchase_inventory(
         quantity=request.quantity,
         unit_cost=request.unit_cost
     )
+    await db.commit()
     
     return {"message": f"Purchased {request.quantity} units"}
 
@@ -20,7 +20,8 @@ class AccountingEngine:
         self, 
         company_id: int, 
         description: str, 
-        entries: List[Tuple[int, float]]  # List of (account_id, amount) tuples
+        entries: List[Tuple[int, float]],  # List of (account_id, amount) tuples
+        commit: bool = True
     ) -> Transaction:
         """
         Create a double-entry transaction.
@@ -29,10 +30,36 @@ class AccountingEngine:
             company_id: The company making the transaction
             description: Human-readable description
             entries: List of (account_id, amount) where positive = debit, negative = credit
+            commit: Commit immediately. Pass False inside a larger unit of work (e.g. a turn);
+                the entries are flushed so balance queries still see them.
         
         Returns:
             The created Transaction object
         
+        Raises:
+            ValueError: If entries don't balance (sum != 0)
+        """
+        transaction = self.stage_transaction(company_id, description, entries)
+        
+        if commit:
+            await self.db.commit()
+        else:
+            await self.db.flush()
+        return transaction
+
+    def stage_transaction(
+        self,
+        company_id: int,
+        description: str,
+        entries: List[Tuple[int, float]]
+    ) -> Transaction:
+        """
+        Validate a double-entry transaction and add it to the session without flushing.
+        
+        Staged transactions and their journal entries are written together at the
+        caller's next flush, so a loop of postings costs batched INSERTs rather than
+        a round-trip each. Balance queries won't see them until then.
+        
         Raises:
             ValueError: If entries don't balance (sum != 0)
         """
@@ -41,25 +68,17 @@ class AccountingEngine:
         if abs(total) > 0.01:  # Allow for floating point errors
             raise ValueError(f"Transaction doesn't balance! Sum: {total}")
         
-        # Create transaction
+        # Create transaction with its journal entries
         transaction = Transaction(
             company_id=company_id,
             description=description,
-            date=datetime.utcnow()
+            date=datetime.utcnow(),
+            journal_entries=[
+                JournalEntry(account_id=account_id, amount=amount)
+                for account_id, amount in entries
+            ]
         )
         self.db.add(transaction)
-        await self.db.flush()  # Get the transaction ID
-        
-        # Create journal entries
-        for account_id, amount in entries:
-            entry = JournalEntry(
-                transaction_id=transaction.id,
-                account_id=account_id,
-                amount=amount
-            )
-            self.db.add(entry)
-        
-        await self.db.commit()
         return transaction
 
     def format_transaction_log(self, transaction: Transaction, entries: List[Tuple[int, float]]) -> str:
@@ -82,6 +101,18 @@ class AccountingEngine:
         balance = result.scalar() or 0.0
         return balance
     
+    async def get_balances_for_accounts(self, account_ids: List[int]) -> Dict[int, float]:
+        """Calculate the balances of several accounts in one query (0.0 for accounts without entries)."""
+        result = await self.db.execute(
+            select(JournalEntry.account_id, func.sum(JournalEntry.amount))
+            .where(JournalEntry.account_id.in_(account_ids))
+            .group_by(JournalEntry.account_id)
+        )
+        balances = dict.fromkeys(account_ids, 0.0)
+        for account_id, balance in result.all():
+            balances[account_id] = balance or 0.0
+        return balances
+    
     async def get_company_cash(self, company_id: int) -> float:
         """Get the cash balance for a company."""
         try:
@@ -90,6 +121,19 @@ class AccountingEngine:
         except Exception:
             return 0.0
 
+    async def get_company_cashes(self, company_ids: List[int]) -> Dict[int, float]:
+        """Get the cash balance for several companies in one query (0.0 for companies without entries)."""
+        result = await self.db.execute(
+            select(Account.company_id, func.sum(JournalEntry.amount))
+            .join(JournalEntry, JournalEntry.account_id == Account.id)
+            .where(Account.code.in_([f"{company_id}-1000" for company_id in company_ids]))
+            .group_by(Account.company_id)
+        )
+        cashes = dict.fromkeys(company_ids, 0.0)
+        for company_id, balance in result.all():
+            cashes[company_id] = balance or 0.0
+        return cashes
+
     async def get_monthly_net_income(self, company_id: int) -> float:
         """
         Calculate net income for the current session state.
@@ -120,6 +164,39 @@ class AccountingEngine:
         # can track deltas if needed.
         return revenue_total - expense_total
     
+    async def get_all_company_financials(self) -> Dict[int, Dict[str, float]]:
+        """
+        Get cash, net income, revenue and owner's capital for every company in one query.
+        
+        Returns:
+            Dict mapping company_id to {"cash", "net_income", "revenue", "capital"}.
+            Revenue and capital are credit balances flipped to positive numbers.
+        """
+        result = await self.db.execute(
+            select(Account.company_id, Account.code, Account.type, func.sum(JournalEntry.amount))
+            .join(JournalEntry, JournalEntry.account_id == Account.id)
+            .group_by(Account.id)
+        )
+        
+        financials: Dict[int, Dict[str, float]] = {}
+        for company_id, code, acc_type, balance in result.all():
+            totals = financials.setdefault(
+                company_id,
+                {"cash": 0.0, "net_income": 0.0, "revenue": 0.0, "capital": 0.0}
+            )
+            balance = balance or 0.0
+            if code == f"{company_id}-1000":
+                totals["cash"] = balance
+            elif code == f"{company_id}-3000":
+                totals["capital"] = -balance
+            if acc_type == AccountType.REVENUE:
+                # Credits are negative, so subtract to get positive revenue
+                totals["revenue"] -= balance
+                totals["net_income"] -= balance
+            elif acc_type == AccountType.EXPENSE:
+                totals["net_income"] -= balance
+        return financials
+    
     async def initialize_company_accounts(self, company_id: int) -> List[Account]:
         """Create standard chart of accounts for a new company."""
         
@@ -4,10 +4,11 @@ Bot AI Decision Making for Ledger Tycoon
 Implements different bot personalities and strategic decision-making.
 """
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Optional
+import math
 import random
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from app.models import Company, CompanyProduct, Product, InventoryItem
 from core.accounting import AccountingEngine
 
@@ -17,12 +18,21 @@ class BotPersonality:
     PREMIUM = "premium"        # High margin, low volume
     BALANCED = "balanced"      # Medium margin, medium volume
 
+# Lookup table for _get_personality, indexed by company id modulo its length
+_PERSONALITIES = (BotPersonality.AGGRESSIVE, BotPersonality.PREMIUM, BotPersonality.BALANCED)
+
 class BotAI:
     """AI decision-making for bot companies."""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, seed: Optional[int] = None, game_engine=None):
         self.db = db
         self.accounting = AccountingEngine(db)
+        # The turn's GameEngine, so purchases reuse its per-turn account id cache
+        self.game_engine = game_engine
+        # Dedicated generator so price variance draws reuse one RNG state across ticks.
+        # Pass a seed for reproducible bot pricing (e.g. in tests or replays).
+        self._rng = random.Random(seed)
+        self._uniform = self._rng.uniform
         
         # Personality targets
         self.personality_config = {
@@ -58,8 +68,7 @@ class BotAI:
     def _get_personality(self, company: Company) -> str:
         """Get or assign personality to a bot."""
         # Simple hash-based assignment for consistency
-        personalities = [BotPersonality.AGGRESSIVE, BotPersonality.PREMIUM, BotPersonality.BALANCED]
-        return personalities[company.id % 3]
+        return _PERSONALITIES[company.id % 3]
 
     async def _update_strategy_memory(self, company: Company, logs: List[str]):
         """Analyze turn performance and update strategy memory."""
@@ -110,7 +119,6 @@ class BotAI:
                     msg = f"    🧠 MEMORY UPDATE: First stockout for {product.name} recorded."
                 else:
                     msg = f"    🧠 MEMORY UPDATE: Stockout #{int(current_count+1)} for {product.name}."
-                print(msg)
                 logs.append(msg)
         
         # Check Pricing Regret (High prices causing lost sales)
@@ -163,7 +171,6 @@ class BotAI:
                     
                     if memory["inventory_waste"][pid_str] > 2:
                         msg = f"    🧠 MEMORY UPDATE: Inventory Waste for {product.name}: {memory['inventory_waste'][pid_str]} turns stuck (Sold {units_sold}/{current_qty+units_sold})"
-                        print(msg)
                         logs.append(msg)
                 else:
                     # Reset if we are selling
@@ -193,7 +200,6 @@ class BotAI:
                         
                         if memory["pricing_regret"][pid_str] > 2:
                              msg = f"    🧠 MEMORY UPDATE: Pricing Regret for {product.name}: Score {memory['pricing_regret'][pid_str]:.1f} (Price ${price:.2f} vs Avg ${avg_price:.2f})"
-                             print(msg)
                              logs.append(msg)
                     else:
                         # Decay regret if we are competitive or selling well
@@ -212,7 +218,7 @@ class BotAI:
         flag_modified(company, "strategy_memory")
         await self.db.commit()
 
-    async def _apply_learned_adjustments(self, company: Company, personality: str, logs: List[str]) -> dict:
+    async def _apply_learned_adjustments(self, company: Company, personality: str, logs: List[str] = None) -> dict:
         """Calculate adjustments to base personality based on memory."""
         if not company.strategy_memory:
             return {}
@@ -235,18 +241,18 @@ class BotAI:
             safety_boost = min(1.0, total_stockout_severity * 0.10)
             adjustments["safety_stock_multiplier"] += safety_boost
             
-            msg = f"    🧠 ADAPTATION: Safety Stock +{safety_boost*100:.0f}% (Due to past stockouts)"
-            print(msg)
-            logs.append(msg)
+            if logs is not None:
+                msg = f"    🧠 ADAPTATION: Safety Stock +{safety_boost*100:.0f}% (Due to past stockouts)"
+                logs.append(msg)
             
         # 2. Caution Adjustment (Aggressive bot becomes more careful)
         if personality == BotPersonality.AGGRESSIVE and total_stockout_severity > 3:
             # If failing often, reduce marketing to save cash for inventory
             adjustments["marketing_budget_offset"] = -0.02 # -2% marketing
             
-            msg = f"    🧠 ADAPTATION: Marketing -2% (Becoming more cautious)"
-            print(msg)
-            logs.append(msg)
+            if logs is not None:
+                msg = f"    🧠 ADAPTATION: Marketing -2% (Becoming more cautious)"
+                logs.append(msg)
             
         return adjustments
 
@@ -267,71 +273,65 @@ class BotAI:
         adjustments = await self._apply_learned_adjustments(company, personality, logs)
         target_margin += adjustments.get("margin_offset", 0.0)
         
-        for cp, product in rows:
+        # Draw the ±5% market-dynamics variance for every product up front
+        uniform = self._uniform
+        variances = [uniform(-0.05, 0.05) for _ in rows]
+        
+        for (cp, product), variance in zip(rows, variances):
             # Use cost-aware pricing that considers actual inventory costs
             cost_aware_price = await self._get_cost_aware_price(
                 product, company.id, target_margin, logs
             )
             
             # Add some randomness (±5%) for market dynamics
-            variance = random.uniform(-0.05, 0.05)  # ±5%
             new_price = cost_aware_price * (1 + variance)
             
             old_price = cp.price
             cp.price = round(new_price, 2)
             
             msg = f"    💵 {product.name}: ${old_price:.2f} → ${cp.price:.2f} (Target margin: {target_margin*100:.0f}%)"
-            print(msg)
             logs.append(msg)
         
         await self.db.commit()
     
     async def _calculate_inventory_cost(self, company_id: int, product_id: int) -> float:
         """Calculate weighted average cost of current inventory."""
+        # Only quantity and WAC are needed, so skip loading full InventoryItem objects
         result = await self.db.execute(
-            select(InventoryItem)
+            select(InventoryItem.quantity, InventoryItem.wac)
             .where(
                 InventoryItem.company_id == company_id,
                 InventoryItem.product_id == product_id
             )
         )
-        items = result.scalars().all()
+        items = result.all()
         
-        if not items:
-            # No inventory, return base cost as fallback
-            product_result = await self.db.execute(
-                select(Product).where(Product.id == product_id)
-            )
-            product = product_result.scalar_one()
-            return product.base_cost
-        
-        total_value = sum(item.quantity * item.wac for item in items)
-        total_quantity = sum(item.quantity for item in items)
+        total_value = sum(quantity * wac for quantity, wac in items)
+        total_quantity = sum(quantity for quantity, _ in items)
         
         if total_quantity == 0:
+            # No inventory, return base cost as fallback
             product_result = await self.db.execute(
-                select(Product).where(Product.id == product_id)
+                select(Product.base_cost).where(Product.id == product_id)
             )
-            product = product_result.scalar_one()
-            return product.base_cost
+            return product_result.scalar_one()
         
         return total_value / total_quantity
     
-    async def _get_cost_aware_price(self, product: Product, company_id: int, target_margin: float, logs: List[str]) -> float:
+    async def _get_cost_aware_price(self, product: Product, company_id: int, target_margin: float, logs: List[str] = None) -> float:
         """Calculate price based on actual inventory cost, not just base cost."""
         # Get current average inventory cost
         avg_cost = await self._calculate_inventory_cost(company_id, product.id)
         
         # Get current inventory quantity for logging
         result = await self.db.execute(
-            select(InventoryItem)
+            select(func.coalesce(func.sum(InventoryItem.quantity), 0))
             .where(
                 InventoryItem.company_id == company_id,
                 InventoryItem.product_id == product.id
             )
         )
-        items = result.scalars().all()
-        current_qty = sum(item.quantity for item in items)
+        current_qty = result.scalar()
         
         # Calculate minimum viable price (5% minimum margin)
         minimum_margin = 0.05
@@ -349,50 +349,44 @@ class BotAI:
         # Ensure we're above minimum viable price
         final_price = max(target_price, minimum_price)
         
-        # Log the cost-aware pricing analysis
-        msg_header = f"    💡 COST-AWARE PRICING ANALYSIS:"
-        msg_product = f"      Product: {product.name}"
-        msg_inv = f"      📦 Current Inventory: {current_qty} units @ avg ${avg_cost:.2f}/unit"
-        msg_base = f"      📊 Base Cost: ${product.base_cost:.2f}"
-        msg_margin = f"      💰 Target Margin: {target_margin*100:.0f}%"
-        msg_base_target = f"      ➡️  Base Target Price: ${base_target:.2f} ({product.base_cost:.2f} × {1+target_margin:.2f})"
-        msg_cost_target = f"      ➡️  Cost-Aware Target: ${cost_aware_target:.2f} ({avg_cost:.2f} × {1+target_margin:.2f})"
-        msg_min = f"      ➡️  Minimum Viable Price: ${minimum_price:.2f} ({avg_cost:.2f} × {1+minimum_margin:.2f})"
-        
-        # Determine which price was selected
-        if final_price == cost_aware_target:
-            decision = "cost-aware target"
-        elif final_price == base_target:
-            decision = "base target"
-        else:
-            decision = "minimum viable"
-        
-        msg_final = f"      ✅ FINAL PRICE: ${final_price:.2f} ({decision})"
-        
-        print(msg_header)
-        print(msg_product)
-        print(msg_inv)
-        print(msg_base)
-        print(msg_margin)
-        print(msg_base_target)
-        print(msg_cost_target)
-        print(msg_min)
-        print(msg_final)
-        
-        logs.append(msg_header)
-        logs.append(msg_product)
-        logs.append(msg_inv)
-        logs.append(msg_base)
-        logs.append(msg_margin)
-        logs.append(msg_base_target)
-        logs.append(msg_cost_target)
-        logs.append(msg_min)
-        logs.append(msg_final)
+        # Log the cost-aware pricing analysis (skipped when nobody reads the logs)
+        if logs is not None:
+            msg_header = f"    💡 COST-AWARE PRICING ANALYSIS:"
+            msg_product = f"      Product: {product.name}"
+            msg_inv = f"      📦 Current Inventory: {current_qty} units @ avg ${avg_cost:.2f}/unit"
+            msg_base = f"      📊 Base Cost: ${product.base_cost:.2f}"
+            msg_margin = f"      💰 Target Margin: {target_margin*100:.0f}%"
+            msg_base_target = f"      ➡️  Base Target Price: ${base_target:.2f} ({product.base_cost:.2f} × {1+target_margin:.2f})"
+            msg_cost_target = f"      ➡️  Cost-Aware Target: ${cost_aware_target:.2f} ({avg_cost:.2f} × {1+target_margin:.2f})"
+            msg_min = f"      ➡️  Minimum Viable Price: ${minimum_price:.2f} ({avg_cost:.2f} × {1+minimum_margin:.2f})"
+        
+            # Determine which price was selected
+            if final_price == cost_aware_target:
+                decision = "cost-aware target"
+            elif final_price == base_target:
+                decision = "base target"
+            else:
+                decision = "minimum viable"
+        
+            msg_final = f"      ✅ FINAL PRICE: ${final_price:.2f} ({decision})"
+        
+            msgs = (
+                msg_header,
+                msg_product,
+                msg_inv,
+                msg_base,
+                msg_margin,
+                msg_base_target,
+                msg_cost_target,
+                msg_min,
+                msg_final,
+            )
+            logs.extend(msgs)
         
         return final_price
     
     async def _evaluate_purchase_viability(self, product: Product, purchase_cost: float, 
-                                           target_margin: float, logs: List[str]) -> Tuple[bool, float, str]:
+                                           target_margin: float, logs: List[str] = None) -> Tuple[bool, float, str]:
         """Evaluate if purchasing at given cost makes economic sense.
         
         Returns: (should_buy, quantity_multiplier, reason)
@@ -435,41 +429,35 @@ class BotAI:
             qty_multiplier = 1.0
             reason = f"Break-even ${breakeven_price:.2f} is below market ${market_estimate:.2f} - profitable purchase"
         
-        # Log the viability analysis
-        msg_header = f"    💡 PURCHASE VIABILITY ANALYSIS:"
-        msg_product = f"      Product: {product.name}"
-        msg_cost = f"      🛒 Purchase Cost: ${purchase_cost:.2f}/unit"
-        msg_margin = f"      📊 Target Margin: {target_margin*100:.0f}%"
-        msg_breakeven = f"      ➡️  Break-Even Price: ${breakeven_price:.2f} ({purchase_cost:.2f} × {1+target_margin:.2f})"
-        msg_market = f"      📈 Market Expectation: ${market_estimate:.2f} (base price)"
-        msg_viability = f"      ⚠️  VIABILITY: {viability} (break-even {'+' if price_gap > 0 else ''}{price_gap_pct:.1f}% vs market)"
-        
-        if should_buy:
-            msg_decision = f"      🔧 DECISION: Purchase at {qty_multiplier*100:.0f}% of recommended quantity"
-        else:
-            msg_decision = f"      🛑 DECISION: SKIP purchase entirely"
-        
-        msg_reason = f"      📝 Reason: {reason}"
-        
-        print(msg_header)
-        print(msg_product)
-        print(msg_cost)
-        print(msg_margin)
-        print(msg_breakeven)
-        print(msg_market)
-        print(msg_viability)
-        print(msg_decision)
-        print(msg_reason)
-        
-        logs.append(msg_header)
-        logs.append(msg_product)
-        logs.append(msg_cost)
-        logs.append(msg_margin)
-        logs.append(msg_breakeven)
-        logs.append(msg_market)
-        logs.append(msg_viability)
-        logs.append(msg_decision)
-        logs.append(msg_reason)
+        # Log the viability analysis (skipped when nobody reads the logs)
+        if logs is not None:
+            msg_header = f"    💡 PURCHASE VIABILITY ANALYSIS:"
+            msg_product = f"      Product: {product.name}"
+            msg_cost = f"      🛒 Purchase Cost: ${purchase_cost:.2f}/unit"
+            msg_margin = f"      📊 Target Margin: {target_margin*100:.0f}%"
+            msg_breakeven = f"      ➡️  Break-Even Price: ${breakeven_price:.2f} ({purchase_cost:.2f} × {1+target_margin:.2f})"
+            msg_market = f"      📈 Market Expectation: ${market_estimate:.2f} (base price)"
+            msg_viability = f"      ⚠️  VIABILITY: {viability} (break-even {'+' if price_gap > 0 else ''}{price_gap_pct:.1f}% vs market)"
+        
+            if should_buy:
+                msg_decision = f"      🔧 DECISION: Purchase at {qty_multiplier*100:.0f}% of recommended quantity"
+            else:
+                msg_decision = f"      🛑 DECISION: SKIP purchase entirely"
+        
+            msg_reason = f"      📝 Reason: {reason}"
+        
+            msgs = (
+                msg_header,
+                msg_product,
+                msg_cost,
+                msg_margin,
+                msg_breakeven,
+                msg_market,
+                msg_viability,
+                msg_decision,
+                msg_reason,
+            )
+            logs.extend(msgs)
         
         return should_buy, qty_multiplier, reason
     
@@ -482,12 +470,10 @@ class BotAI:
         cash = await self.accounting.get_company_cash(company.id)
         
         msg_cash = f"    💰 Cash available: ${cash:,.2f}"
-        print(msg_cash)
         logs.append(msg_cash)
         
         if cash < 10000:  # Not enough cash
             msg_low = f"    ⚠️  Low cash, skipping inventory purchase"
-            print(msg_low)
             logs.append(msg_low)
             return
         
@@ -499,11 +485,44 @@ class BotAI:
         adjustments = await self._apply_learned_adjustments(company, personality, logs)
         safety_multiplier = adjustments.get("safety_stock_multiplier", 1.0)
         
-        # Get all products
-        result = await self.db.execute(select(Product))
+        # Get the products this company actually carries
+        result = await self.db.execute(
+            select(Product)
+            .join(CompanyProduct, CompanyProduct.product_id == Product.id)
+            .where(CompanyProduct.company_id == company.id)
+        )
         products = result.scalars().all()
         
+        # Fetch supply disruption cost modifiers for all products in one query
+        cost_modifiers = await events_engine.get_all_cost_modifiers() if events_engine else {}
+        
+        # Forecast, safety stock and stock on hand for all products (one query each)
+        product_ids = [product.id for product in products]
+        forecasts = await inv_mgr.forecast_demand_bulk(company.id, product_ids, events_engine=events_engine)
+        base_safety_stocks = await inv_mgr.calculate_safety_stock_bulk(company.id, product_ids)
+        current_inventories = await inv_mgr.get_current_inventory_bulk(company.id, product_ids)
+        
+        # Supply events only ever raise costs, so base cost is a floor on any unit cost
+        min_unit_cost = min((p.base_cost for p in products), default=0.0)
+        
+        # Purchases are collected here and placed in one batch after the loop.
+        # committed_cost only decides affordability; cash is charged once the batch succeeds.
+        purchases = []
+        committed_cost = 0.0
+        
+        engine = self.game_engine
+        if engine is None:
+            # Import here to avoid circular dependency
+            from core.engine import GameEngine
+            engine = GameEngine(self.db)
+        
         for product in products:
+            available_cash = cash - committed_cost
+            if available_cash < min_unit_cost:
+                msg_exhausted = f"    ⚠️  Cash exhausted (${available_cash:,.2f}), skipping remaining products"
+                logs.append(msg_exhausted)
+                break
+            
             # Get intelligent reorder recommendation (with learned safety stock)
             # We need to manually adjust the recommendation because inv_mgr doesn't know about our memory
             # So we'll get the standard recommendation, and if safety_multiplier > 1.0, we add more.
@@ -511,13 +530,11 @@ class BotAI:
             
             # Standard recommendation includes standard safety stock.
             # We calculate EXTRA safety stock needed.
-            base_safety = await inv_mgr.calculate_safety_stock(company.id, product.id)
+            base_safety = base_safety_stocks[product.id]
             extra_safety = base_safety * (safety_multiplier - 1.0)
             
-            recommended_qty = await inv_mgr.get_reorder_quantity(
-                company_id=company.id,
-                product_id=product.id,
-                events_engine=events_engine
+            recommended_qty = inv_mgr.reorder_quantity(
+                forecasts[product.id], base_safety, current_inventories[product.id]
             )
             
             # Add learned extra safety stock
@@ -526,16 +543,12 @@ class BotAI:
             
             if recommended_qty == 0:
                 msg_skip = f"    ℹ️  {product.name}: Inventory sufficient (no reorder needed)"
-                print(msg_skip)
                 logs.append(msg_skip)
                 continue
             
             # Get base cost and apply market event modifiers
             base_cost = product.base_cost
-            cost_modifier = 1.0
-            
-            if events_engine:
-                cost_modifier = await events_engine.get_cost_modifier(product.id)
+            cost_modifier = cost_modifiers.get(product.id, 1.0)
             
             unit_cost = base_cost * cost_modifier
             
@@ -543,7 +556,6 @@ class BotAI:
             if cost_modifier != 1.0:
                 modifier_pct = int((cost_modifier - 1) * 100)
                 msg_cost = f"    ⚠️  Supply Chain Impact: ${base_cost:.2f} → ${unit_cost:.2f} (×{cost_modifier:.2f}, +{modifier_pct}%)"
-                print(msg_cost)
                 logs.append(msg_cost)
             
             # Get bot personality for margin calculation
@@ -558,7 +570,6 @@ class BotAI:
             if not should_buy:
                 # Skip this purchase entirely
                 msg_skip = f"    🛑 SKIPPING {product.name} purchase: {reason}"
-                print(msg_skip)
                 logs.append(msg_skip)
                 continue
             
@@ -566,55 +577,62 @@ class BotAI:
             viability_adjusted_qty = int(recommended_qty * qty_multiplier)
             
             # Apply cash flow constraint
-            max_affordable = int(cash / unit_cost)
+            max_affordable = math.floor(available_cash / unit_cost)
             purchase_qty = min(viability_adjusted_qty, max_affordable)
             
             if purchase_qty == 0:
                 msg_nofunds = f"    ⚠️  Not enough cash to buy {product.name}"
-                print(msg_nofunds)
                 logs.append(msg_nofunds)
                 continue
             
             total_cost = purchase_qty * unit_cost
             
             # Get forecast info for logging
-            forecast = await inv_mgr.forecast_demand(company.id, product.id, events_engine=events_engine)
-            base_safety_stock = await inv_mgr.calculate_safety_stock(company.id, product.id)
-            safety_stock = base_safety_stock * safety_multiplier # Apply learning multiplier
-            current_inv = await inv_mgr.get_current_inventory(company.id, product.id)
+            forecast = forecasts[product.id]
+            safety_stock = base_safety * safety_multiplier # Apply learning multiplier
+            current_inv = current_inventories[product.id]
             
             msg_analysis = f"    📊 {product.name} Analysis: Forecast={int(forecast)}, Safety={int(safety_stock)}, Current={current_inv}"
-            print(msg_analysis)
             logs.append(msg_analysis)
             
             if qty_multiplier < 1.0:
                 msg_adjusted = f"    🔧 Quantity Adjusted: {recommended_qty} → {viability_adjusted_qty} (×{qty_multiplier:.0%} due to viability)"
-                print(msg_adjusted)
                 logs.append(msg_adjusted)
             
             msg_buy = f"    🛒 Purchasing {purchase_qty} × {product.name} @ ${unit_cost:.2f} = ${total_cost:,.2f}"
-            print(msg_buy)
             logs.append(msg_buy)
             
-            # Import here to avoid circular dependency
-            from core.engine import GameEngine
-            engine = GameEngine(self.db)
-            
+            # Drop a bad line here so it can't take the rest of the batch down with it
             try:
-                await engine.purchase_inventory(
-                    company_id=company.id,
-                    product_id=product.id,
-                    quantity=purchase_qty,
-                    unit_cost=unit_cost
-                )
-                cash -= total_cost
-                msg_success = f"    ✅ Purchase complete. Remaining cash: ${cash:,.2f}"
-                print(msg_success)
-                logs.append(msg_success)
-            except Exception as e:
-                msg_fail = f"    ❌ Purchase failed: {e}"
-                print(msg_fail)
-                logs.append(msg_fail)
+                await engine.validate_purchase(company.id, product.id, purchase_qty, unit_cost)
+            except ValueError as e:
+                msg_invalid = f"    ❌ Purchase failed: {e} (skipped: {product.name})"
+                logs.append(msg_invalid)
+                continue
+            
+            purchases.append((company.id, product.id, purchase_qty, unit_cost))
+            committed_cost += total_cost
+        
+        if not purchases:
+            return
+        
+        try:
+            # Lines were validated above, so this only fails on database errors and the
+            # savepoint undoes the whole batch without discarding the rest of the turn
+            purchase_logs = []
+            async with self.db.begin_nested():
+                await engine.purchase_inventory_batch(purchases, purchase_logs)
+        except Exception as e:
+            product_names = {product.id: product.name for product in products}
+            batch_names = ", ".join(product_names[product_id] for _, product_id, _, _ in purchases)
+            msg_fail = f"    ❌ Purchase failed: {e} (rolled back: {batch_names})"
+            logs.append(msg_fail)
+            return
+        
+        logs.extend(purchase_logs)
+        cash -= committed_cost
+        msg_success = f"    ✅ Purchase complete. Remaining cash: ${cash:,.2f}"
+        logs.append(msg_success)
 
     async def _manage_branding(self, company: Company, personality: str, logs: List[str]):
         """Decide and execute marketing spend to build Brand Equity."""
@@ -662,10 +680,6 @@ class BotAI:
         msg_spend = f"      💰 Marketing Spend: ${marketing_spend:,.2f} ({budget_pct*100:.0f}% of available cash)"
         msg_equity = f"      📈 Brand Equity: {old_brand:.2f} → {company.brand_equity:.2f} (+{brand_boost:.2f})"
         
-        print(msg_header)
-        print(msg_spend)
-        print(msg_equity)
-        
         logs.append(msg_header)
         logs.append(msg_spend)
         logs.append(msg_equity)
@@ -4,15 +4,30 @@ Game Engine for Ledger Tycoon
 Manages the game loop, turn processing, and game state.
 """
 
-from typing import List, Dict
+from typing import List, Dict, Tuple
+from collections import defaultdict
+import sys
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from app.models import Company, Product, Warehouse, InventoryItem, CompanyProduct, FinancialSnapshot, JournalEntry, Account, AccountType
+from sqlalchemy import select, func, insert, update, delete, tuple_, Row
+from sqlalchemy.exc import NoResultFound
+from app.models import (
+    Company, Product, Warehouse, InventoryItem, CompanyProduct, FinancialSnapshot, JournalEntry,
+    Account, AccountType, Transaction, GameState, MarketEvent, MarketHistory
+)
 from core.accounting import AccountingEngine
 from core.market import MarketEngine
+from core.market_events import MarketEventsEngine
+from core.inventory_manager import InventoryManager
+from core.bot_ai import BotAI
 import random
 
+# Log emoji for newly triggered market events, keyed by MarketEvent.event_type
+EVENT_EMOJI = {
+    "ECONOMIC_BOOM": "🎉",
+    "SUPPLY_DISRUPTION": "⚠️",
+}
+
 class GameEngine:
     """Main game engine that processes turns and manages game state."""
     
@@ -22,10 +37,31 @@ class GameEngine:
         self.market = MarketEngine(db)
         self.current_month = 1
         self.current_year = 2026
+        # (company_id, account code) -> account id; the chart of accounts never changes mid-game
+        self._account_cache: Dict[Tuple[int, str], int] = {}
+        # (month, year) -> hash of the snapshot figures this engine last wrote for that period
+        self._last_snapshot_hash: Dict[Tuple[int, int], int] = {}
+    
+    async def _load_account_cache(self):
+        """Load every company's account ids in a single query."""
+        result = await self.db.execute(select(Account.company_id, Account.code, Account.id))
+        self._account_cache = {
+            # Stored codes are prefixed with the company id ("{company_id}-{code}")
+            (company_id, code.split("-", 1)[1]): account_id
+            for company_id, code, account_id in result.all()
+        }
+    
+    async def _get_account_id(self, company_id: int, code: str) -> int:
+        """Get an account id by company and code, hitting the database only on a cache miss."""
+        key = (company_id, code)
+        account_id = self._account_cache.get(key)
+        if account_id is None:
+            account = await self.accounting._get_account_by_code(company_id, code)
+            account_id = self._account_cache[key] = account.id
+        return account_id
     
     async def load_state(self):
         """Load game state from database."""
-        from app.models import GameState
         result = await self.db.execute(select(GameState))
         state = result.scalar_one_or_none()
         if state:
@@ -42,23 +78,16 @@ class GameEngine:
     async def initialize_game(self) -> Company:
         """Initialize a new game with player company and bot competitors."""
         # Clear all existing game data to allow restarting
-        from sqlalchemy import delete
-        from app.models import Account, Transaction, JournalEntry, Warehouse, InventoryItem, CompanyProduct, GameState
-        
-        # Delete in reverse order of dependencies
-        await self.db.execute(delete(JournalEntry))
-        await self.db.execute(delete(Transaction))
-        await self.db.execute(delete(Account))
-        await self.db.execute(delete(InventoryItem))
-        await self.db.execute(delete(CompanyProduct))
-        await self.db.execute(delete(Warehouse))
-        await self.db.execute(delete(Product))
-        await self.db.execute(delete(Company))
-        await self.db.execute(delete(GameState))
-        
-        # Clear market events
-        from app.models import MarketEvent
-        await self.db.execute(delete(MarketEvent))
+        
+        # Delete in reverse order of dependencies, all within the one open transaction
+        for model in (
+            JournalEntry, Transaction, Account, InventoryItem, CompanyProduct,
+            Warehouse, MarketEvent, Product, Company, GameState,
+        ):
+            await self.db.execute(delete(model))
+        
+        # Account ids from the previous game are gone
+        self._account_cache.clear()
         
         # Reset game state
         state = GameState(current_month=1, current_year=2026)
@@ -67,7 +96,6 @@ class GameEngine:
         
         self.current_month = 1
         self.current_year = 2026
-        await self.db.commit()
         
         # Create player company
         player_company = Company(
@@ -93,14 +121,16 @@ class GameEngine:
         )
         self.db.add(warehouse)
         
-        # Create some bot companies
+        # Create some bot companies (one multi-row insert, ids returned in input order)
         bot_names = ["TechCorp Inc", "Global Traders", "SmartBiz Ltd"]
-        for bot_name in bot_names:
-            bot = Company(name=bot_name, is_player=False)
-            self.db.add(bot)
-            await self.db.flush()
-            await self.accounting.initialize_company_accounts(bot.id)
-            await self.accounting.record_cash_investment(bot.id, 100_000.00)
+        result = await self.db.execute(
+            insert(Company).returning(Company.id, sort_by_parameter_order=True),
+            [{"name": bot_name, "is_player": False} for bot_name in bot_names]
+        )
+        bot_ids = result.scalars().all()
+        for bot_id in bot_ids:
+            await self.accounting.initialize_company_accounts(bot_id)
+            await self.accounting.record_cash_investment(bot_id, 100_000.00)
         
         # Create some products
         products = [
@@ -109,59 +139,48 @@ class GameEngine:
             ("TOOL-003", "Professional Tool", 30.00, 60.00),
         ]
         
-        created_products = []
-        for sku, name, base_cost, base_price in products:
-            product = Product(
-                sku=sku,
-                name=name,
-                base_cost=base_cost,
-                base_price=base_price
-            )
-            self.db.add(product)
-            created_products.append((product, base_cost, base_price))
-        
-        await self.db.flush()  # Get product IDs
+        result = await self.db.execute(
+            insert(Product).returning(Product.id, sort_by_parameter_order=True),
+            [
+                {"sku": sku, "name": name, "base_cost": base_cost, "base_price": base_price}
+                for sku, name, base_cost, base_price in products
+            ]
+        )
+        created_products = [
+            (product_id, base_cost, base_price)
+            for product_id, (_, _, base_cost, base_price) in zip(result.scalars().all(), products)
+        ]
         
         # Create CompanyProduct entries for all companies
-        all_companies_result = await self.db.execute(select(Company))
-        all_companies = all_companies_result.scalars().all()
-        
-        for company in all_companies:
-            for product, base_cost, base_price in created_products:
-                # Set initial price at base_price for all companies
-                company_product = CompanyProduct(
-                    company_id=company.id,
-                    product_id=product.id,
-                    price=base_price
-                )
-                self.db.add(company_product)
+        company_ids = [player_company.id, *bot_ids]
+        
+        # Set initial price at base_price for all companies (one executemany insert)
+        company_product_rows = [
+            {"company_id": company_id, "product_id": product_id, "price": base_price}
+            for company_id in company_ids
+            for product_id, base_cost, base_price in created_products
+        ]
+        await self.db.execute(insert(CompanyProduct), company_product_rows)
         
         await self.db.commit()
         
         # Initialize bot inventory to prevent Month 1 unfair advantage
-        from core.inventory_manager import InventoryManager
-        from core.bot_ai import BotAI
-        
         inv_mgr = InventoryManager(self.db)
-        bot_ai = BotAI(self.db)
         
-        for company in all_companies:
-            if not company.is_player:  # Only for bot companies
-                for product, base_cost, base_price in created_products:
-                    # Get recommended starting inventory (forecast will use market average since no history)
-                    recommended_qty = await inv_mgr.get_reorder_quantity(
-                        company_id=company.id,
-                        product_id=product.id
-                    )
-                    
-                    # Purchase initial inventory
-                    if recommended_qty > 0:
-                        await self.purchase_inventory(
-                            company_id=company.id,
-                            product_id=product.id,
-                            quantity=recommended_qty,
-                            unit_cost=base_cost
-                        )
+        product_ids = [product_id for product_id, _, _ in created_products]
+        
+        seed_purchases = []
+        for bot_id in bot_ids:
+            # Get recommended starting inventory (forecast will use market average since no history)
+            recommended_qtys = await inv_mgr.get_reorder_quantities(bot_id, product_ids)
+            
+            for product_id, base_cost, base_price in created_products:
+                recommended_qty = recommended_qtys[product_id]
+                if recommended_qty > 0:
+                    seed_purchases.append((bot_id, product_id, recommended_qty, base_cost))
+        
+        # Purchase initial inventory
+        await self.purchase_inventory_batch(seed_purchases)
         
         await self.db.commit()
         return player_company
@@ -180,19 +199,20 @@ class GameEngine:
 
     async def _process_turn_unsafe(self) -> Dict:
         """Process one turn (month) of the game."""
-        from sqlalchemy import delete
-        from app.models import FinancialSnapshot, MarketHistory
 
-        # Robustness: Clear any existing snapshots/history for this specific turn at the START 
+        # Robustness: Clear any existing history for this specific turn at the START 
         # to ensure we don't wipe data recorded *during* this turn's processing.
-        await self.db.execute(delete(FinancialSnapshot).where(FinancialSnapshot.month == self.current_month, FinancialSnapshot.year == self.current_year))
+        # (Snapshots for a re-run turn are replaced in _record_financial_snapshots.)
         await self.db.execute(delete(MarketHistory).where(MarketHistory.month == self.current_month, MarketHistory.year == self.current_year))
 
+        # Resolve all account ids once for this turn's postings
+        await self._load_account_cache()
+
         events = []
         logs = []
         
         def log(msg):
-            print(msg)
+            # Buffered only; the whole turn log is written to stdout once at the end
             logs.append(msg)
         
         log("\n" + "="*80)
@@ -200,7 +220,6 @@ class GameEngine:
         log("="*80)
         
         # Initialize market events engine
-        from core.market_events import MarketEventsEngine
         events_engine = MarketEventsEngine(self.db, self.current_month, self.current_year)
         
         # Trigger new random events
@@ -208,7 +227,7 @@ class GameEngine:
         if new_events:
             log("\n📰 NEW MARKET EVENTS:")
             for event in new_events:
-                emoji = "🎉" if "Boom" in event.description else "⚠️" if "Disruption" in event.description else "📉"
+                emoji = EVENT_EMOJI.get(event.event_type, "📉")
                 log(f"  {emoji} {event.description}")
         
         # Display active market conditions
@@ -227,13 +246,16 @@ class GameEngine:
         companies = result.scalars().all()
         
         log(f"\n📊 Companies in game: {len(companies)}")
+        cashes = await self.accounting.get_company_cashes([company.id for company in companies])
         for company in companies:
-            cash = await self.accounting.get_company_cash(company.id)
+            cash = cashes[company.id]
             log(f"  - {company.name} ({'PLAYER' if company.is_player else 'BOT'}): Cash = ${cash:,.2f}")
         
-        # Get all products
-        result = await self.db.execute(select(Product))
-        products = result.scalars().all()
+        # Get all products (read-only this turn, so plain rows instead of ORM objects)
+        result = await self.db.execute(
+            select(Product.id, Product.name, Product.sku, Product.base_cost, Product.base_price)
+        )
+        products = result.all()
         
         log(f"\n📦 Products: {len(products)}")
         for product in products:
@@ -241,65 +263,23 @@ class GameEngine:
         
         # Process sales for each product
         log("\n💰 PROCESSING SALES:")
+        company_by_id = {company.id: company for company in companies}
+        
+        # Fetch every company's price for every product once, grouped by product
+        result = await self.db.execute(
+            select(CompanyProduct.product_id, CompanyProduct.company_id, CompanyProduct.price)
+            .join(Company, Company.id == CompanyProduct.company_id)
+            .order_by(CompanyProduct.id)
+        )
+        prices_by_product: Dict[int, Dict[int, float]] = defaultdict(dict)
+        for product_id, company_id, price in result.all():
+            prices_by_product[product_id][company_id] = price
+        
         for product in products:
-            log(f"\n  Product: {product.name}")
-            
-            # Get all company prices for this product
-            result = await self.db.execute(
-                select(CompanyProduct, Company)
-                .join(Company, Company.id == CompanyProduct.company_id)
-                .where(CompanyProduct.product_id == product.id)
-            )
-            company_products = result.all()
-            
-            company_prices = {}
-            for cp, company in company_products:
-                company_prices[company.id] = cp.price
-                log(f"    {company.name}: Price=${cp.price:.2f}")
-            
-            # Calculate Average Market Price
-            if company_prices:
-                avg_price = sum(company_prices.values()) / len(company_prices)
-                log(f"    📊 Average Market Price: ${avg_price:.2f}")
-            
-            # Calculate market demand
-            demand = await self.market.calculate_market_demand(
-                product.id, 
-                events_engine=events_engine,
-                logs=logs
-            )
-            log(f"    📈 Final Market Demand: {int(demand)} units")
-            
-            # Distribute sales
-            sales_distribution = await self.market.distribute_sales(
-                product.id,
-                demand
-            )
-            
-            # Calculate Total Market Sales and Share
-            total_market_units = sum(int(u) for u in sales_distribution.values())
-            
-            log(f"    📊 Sales Distribution (Total Market: {total_market_units} units):")
-            for company_id, units_sold_float in sales_distribution.items():
-                units_sold = int(units_sold_float)
-                company = next(c for c in companies if c.id == company_id)
-                price = company_prices[company_id]
-                revenue = units_sold * price
-                
-                # Calculate Market Share %
-                share_pct = (units_sold / total_market_units * 100) if total_market_units > 0 else 0
-                
-                log(f"      {company.name}: {units_sold} units ({share_pct:.1f}%) × ${price:.2f} = ${revenue:,.2f}")
-            
-            # Process sales for each company
-            await self.market.process_product_sales(
-                product_id=product.id,
-                sales_distribution=sales_distribution,
-                company_prices=company_prices,
-                month=self.current_month,
-                year=self.current_year,
-                db=self.db,
-                logs=logs
+            # Products are processed one at a time: every step shares this turn's
+            # AsyncSession, which must not be used by concurrent coroutines
+            await self._process_product_market(
+                product, company_by_id, prices_by_product[product.id], events_engine, log, logs
             )
         
         # Process warehouse costs
@@ -307,15 +287,12 @@ class GameEngine:
         
         # Bot AI decisions
         log("\n🤖 BOT AI DECISIONS:")
-        from core.bot_ai import BotAI
-        for company in companies:
-            if not company.is_player:
-                log(f"\n  {company.name}:")
-                bot_ai = BotAI(self.db)
-                # 1. Learn from previous turn (before making new decisions)
-                await bot_ai._update_strategy_memory(company, logs)
-                # 2. Make new decisions based on updated memory
-                await bot_ai.make_decisions(company, logs, events_engine=events_engine)  # Pass logs list and events_engine
+        # Bots run one after another: they share this turn's AsyncSession, and their
+        # purchases and price changes must land in the same transaction
+        bot_ai = BotAI(self.db, game_engine=self)
+        bots = [company for company in companies if not company.is_player]
+        for company in bots:
+            logs.extend(await self._run_bot_turn(bot_ai, company, events_engine))
         
         # New: Player Marketing Logic
         await self._manage_player_branding(logs)
@@ -336,12 +313,13 @@ class GameEngine:
             self.current_year += 1
             events.append(f"🎉 New Year: {self.current_year}")
     
-        # Update database state
-        from app.models import GameState
-        result = await self.db.execute(select(GameState))
-        state = result.scalar_one()
-        state.current_month = self.current_month
-        state.current_year = self.current_year
+        # Update database state (single-row table, so a blind UPDATE is enough)
+        state_result = await self.db.execute(
+            update(GameState).values(current_month=self.current_month, current_year=self.current_year)
+        )
+        if state_result.rowcount == 0:
+            # The state row is gone (e.g. cleared mid-game); recreate it rather than lose the advance
+            self.db.add(GameState(current_month=self.current_month, current_year=self.current_year))
         
         log(f"\n⏰ Advanced to: {self.current_month}/{self.current_year}")
 
@@ -361,28 +339,28 @@ class GameEngine:
         
         # Process economic evolution (Improve/Worsen active events)
         await events_engine.process_economic_evolution()
-        await self.db.commit()
 
         await events_engine.update_event_durations()
-        await self.db.commit()  # Commit the duration updates
+        await self.db.commit()  # Commit the evolution and duration updates together
 
         # New: Player Performance Report
         await self._record_player_report(logs)
-        
-        # New: Branding & Competitive Advantage Report
-        await self._record_brand_report(logs)
 
         # New: General Ledger Report for Verification
         await self._log_general_ledger(logs)
         
         # Final state
         log("\n📊 FINAL SUMMARY:")
+        cashes = await self.accounting.get_company_cashes([company.id for company in companies])
         for company in companies:
-            cash = await self.accounting.get_company_cash(company.id)
+            cash = cashes[company.id]
             log(f"  {company.name}: Cash = ${cash:,.2f}")
         
         log("="*80 + "\n")
         
+        # One write for the whole turn instead of a print per line
+        sys.stdout.write("\n".join(logs) + "\n")
+        
         return {
             "month": self.current_month,
             "year": self.current_year,
@@ -390,48 +368,128 @@ class GameEngine:
             "logs": logs
         }
     
+    async def _run_bot_turn(self, bot_ai: BotAI, company: Company, events_engine) -> List[str]:
+        """Run one bot's learning and decisions for this turn, returning its own log lines."""
+        bot_logs = [f"\n  {company.name}:"]
+        # 1. Learn from previous turn (before making new decisions)
+        await bot_ai._update_strategy_memory(company, bot_logs)
+        # 2. Make new decisions based on updated memory
+        await bot_ai.make_decisions(company, bot_logs, events_engine=events_engine)
+        return bot_logs
+    
+    async def _process_product_market(
+        self,
+        product: Row,
+        company_by_id: Dict[int, Company],
+        company_prices: Dict[int, float],
+        events_engine,
+        log,
+        logs: List[str]
+    ):
+        """
+        Run demand, distribution and sales for a single product within the current turn.
+        
+        product is a (id, name, sku, base_cost, base_price) row from the turn's product select.
+        """
+        log(f"\n  Product: {product.name}")
+        
+        # Company prices for this product were prefetched for the whole turn
+        for company_id, price in company_prices.items():
+            log(f"    {company_by_id[company_id].name}: Price=${price:.2f}")
+        
+        # Calculate Average Market Price
+        if company_prices:
+            avg_price = sum(company_prices.values()) / len(company_prices)
+            log(f"    📊 Average Market Price: ${avg_price:.2f}")
+        
+        # Calculate market demand
+        demand = await self.market.calculate_market_demand(
+            product.id, 
+            events_engine=events_engine,
+            logs=logs
+        )
+        log(f"    📈 Final Market Demand: {int(demand)} units")
+        
+        # Distribute sales (already whole units; totals, logging and the sales step all use these)
+        units_by_company = await self.market.distribute_sales(
+            product.id,
+            demand
+        )
+        
+        # Calculate Total Market Sales and Share
+        total_market_units = sum(units_by_company.values())
+        
+        log(f"    📊 Sales Distribution (Total Market: {total_market_units} units):")
+        for company_id, units_sold in units_by_company.items():
+            company = company_by_id[company_id]
+            price = company_prices[company_id]
+            revenue = units_sold * price
+            
+            # Calculate Market Share %
+            share_pct = (units_sold / total_market_units * 100) if total_market_units > 0 else 0
+            
+            log(f"      {company.name}: {units_sold} units ({share_pct:.1f}%) × ${price:.2f} = ${revenue:,.2f}")
+        
+        # Process sales for each company
+        await self.market.process_product_sales(
+            product_id=product.id,
+            sales_distribution=units_by_company,
+            company_prices=company_prices,
+            month=self.current_month,
+            year=self.current_year,
+            db=self.db,
+            logs=logs
+        )
+    
     async def _process_warehouse_costs(self, logs: List[str] = None):
         """Deduct monthly warehouse rent from all companies."""
         if logs is not None:
             title = "\n🏭 WAREHOUSE COSTS:"
-            print(title)
             logs.append(title)
             
-        result = await self.db.execute(select(Warehouse))
-        warehouses = result.scalars().all()
+        result = await self.db.execute(
+            select(Warehouse.company_id, Warehouse.name, Warehouse.monthly_cost)
+        )
+        warehouses = result.all()
+        
+        # Total each company's rent so it posts as one transaction per company
+        rent_by_company = defaultdict(float)
+        names_by_company = defaultdict(list)
+        for company_id, name, monthly_cost in warehouses:
+            rent_by_company[company_id] += monthly_cost
+            names_by_company[company_id].append(name)
+            
+            if logs is not None:
+                log_msg = f"    Build/Rent: {name} (-${monthly_cost:,.2f})"
+                logs.append(log_msg)
         
-        for warehouse in warehouses:
+        for company_id, total_rent in rent_by_company.items():
             # Get accounts
-            cash_acc = await self.accounting._get_account_by_code(warehouse.company_id, "1000")
-            rent_exp_acc = await self.accounting._get_account_by_code(warehouse.company_id, "5100")
+            cash_acc_id = await self._get_account_id(company_id, "1000")
+            rent_exp_acc_id = await self._get_account_id(company_id, "5100")
             
             # Record rent expense
             await self.accounting.create_transaction(
-                company_id=warehouse.company_id,
-                description=f"Warehouse rent - {warehouse.name}",
+                company_id=company_id,
+                description=f"Warehouse rent - {', '.join(names_by_company[company_id])}",
                 entries=[
-                    (rent_exp_acc.id, warehouse.monthly_cost),   # Debit Expense
-                    (cash_acc.id, -warehouse.monthly_cost),      # Credit Cash
-                ]
+                    (rent_exp_acc_id, total_rent),   # Debit Expense
+                    (cash_acc_id, -total_rent),      # Credit Cash
+                ],
+                commit=False
             )
-            
-            if logs is not None:
-                log_msg = f"    Build/Rent: {warehouse.name} (-${warehouse.monthly_cost:,.2f})"
-                print(log_msg)
-                logs.append(log_msg)
     
 
     
     async def _process_bot_decisions(self):
         """AI decides what bots should do this turn."""
-        from core.bot_ai import BotAI
         
         result = await self.db.execute(
             select(Company).where(Company.is_player == False)
         )
         bots = result.scalars().all()
         
-        bot_ai = BotAI(self.db)
+        bot_ai = BotAI(self.db, game_engine=self)
         for bot in bots:
             await bot_ai.make_decisions(bot)
     
@@ -440,7 +498,8 @@ class GameEngine:
         company_id: int, 
         product_id: int, 
         quantity: int, 
-        unit_cost: float
+        unit_cost: float,
+        logs: List[str] = None
     ):
         """
         Purchase inventory for a company.
@@ -448,125 +507,172 @@ class GameEngine:
         Records:
         - Debit Inventory
         - Credit Cash (or Credit Accounts Payable if on credit)
+        
+        Does not commit; callers commit once their batch of work is done.
         """
-        total_cost = quantity * unit_cost
-        
-        # Get accounts
-        inventory_acc = await self.accounting._get_account_by_code(company_id, "1200")
-        cash_acc = await self.accounting._get_account_by_code(company_id, "1000")
-        
-        # Record purchase
-        await self.accounting.create_transaction(
-            company_id=company_id,
-            description=f"Purchase {quantity} units",
-            entries=[
-                (inventory_acc.id, total_cost),   # Debit Inventory
-                (cash_acc.id, -total_cost),       # Credit Cash
-            ]
-        )
+        await self.purchase_inventory_batch([(company_id, product_id, quantity, unit_cost)], logs)
+    
+    async def validate_purchase(
+        self,
+        company_id: int,
+        product_id: int,
+        quantity: int,
+        unit_cost: float
+    ) -> Tuple[int, int]:
+        """
+        Check a purchase line before it is placed.
+        
+        Returns the company's (inventory, cash) account ids for the line.
+        
+        Raises:
+            ValueError: If quantity or unit cost isn't positive, or the company
+                is missing its inventory or cash account
+        """
+        if quantity <= 0:
+            raise ValueError(f"Purchase quantity must be positive (product {product_id}: {quantity})")
+        if not unit_cost > 0:
+            raise ValueError(f"Unit cost must be positive (product {product_id}: {unit_cost})")
+        
+        try:
+            inventory_acc_id = await self._get_account_id(company_id, "1200")
+            cash_acc_id = await self._get_account_id(company_id, "1000")
+        except NoResultFound:
+            raise ValueError(f"Company {company_id} has no inventory/cash account")
+        return inventory_acc_id, cash_acc_id
+    
+    async def purchase_inventory_batch(
+        self,
+        purchases: List[Tuple[int, int, int, float]],
+        logs: List[str] = None
+    ):
+        """
+        Purchase inventory for several (company_id, product_id, quantity, unit_cost) lines at once.
+        
+        Every line is validated before anything is written, then gets its own
+        purchase transaction. All affected inventory rows are read in a single
+        query and the ledger and WAC updates are written in one flush.
+        WAC calculation lines are appended to logs.
+        
+        Does not commit; callers commit once their batch of work is done.
+        
+        Raises:
+            ValueError: If any line fails validate_purchase (nothing is written)
+        """
+        if logs is None:
+            logs = []
+        
+        if not purchases:
+            return
+        
+        accounts = [await self.validate_purchase(*purchase) for purchase in purchases]
+        
+        # Record purchases (one ledger transaction per line, flushed together below)
+        for (company_id, product_id, quantity, unit_cost), (inventory_acc_id, cash_acc_id) in zip(purchases, accounts):
+            total_cost = quantity * unit_cost
+            self.accounting.stage_transaction(
+                company_id=company_id,
+                description=f"Purchase {quantity} units",
+                entries=[
+                    (inventory_acc_id, total_cost),   # Debit Inventory
+                    (cash_acc_id, -total_cost),       # Credit Cash
+                ]
+            )
         
         # Update inventory tracking
-        # Find or create inventory item
+        # Find all existing inventory items for these purchases in one round-trip
+        keys = {(company_id, product_id) for company_id, product_id, _, _ in purchases}
         result = await self.db.execute(
             select(InventoryItem)
-            .where(InventoryItem.company_id == company_id)
-            .where(InventoryItem.product_id == product_id)
-            .with_for_update()
+            .where(tuple_(InventoryItem.company_id, InventoryItem.product_id).in_(keys))
         )
-        inv_item = result.scalar_one_or_none()
-        
-        if inv_item:
-            # Update WAC (Weighted Average Cost)
-            old_qty = inv_item.quantity
-            old_total = old_qty * inv_item.wac
-            new_total = old_total + total_cost
-            inv_item.quantity += quantity
-            inv_item.wac = new_total / inv_item.quantity
-            
-            # Log WAC calculation
-            if old_qty == 0:
-                 print(f"    📦 WAC INITIALIZATION (First Stock): {product_id} | Buy: {quantity} @ ${unit_cost:.2f}")
-                 print(f"    🧮 Initial WAC: ${inv_item.wac:.2f}")
-            else:
-                 print(f"    📦 WAC UPDATE: {product_id} | Old WAC: ${old_total/old_qty:.2f} | New Buy: {quantity} @ ${unit_cost:.2f}")
-                 print(f"    🧮 New WAC: ${new_total:.2f} / {inv_item.quantity} units = ${inv_item.wac:.2f}")
-        else:
-            # Create new inventory item
-            inv_item = InventoryItem(
-                company_id=company_id,
-                product_id=product_id,
-                quantity=quantity,
-                wac=unit_cost,
-                warehouse_id=None  # TODO: assign to specific warehouse
-            )
-            self.db.add(inv_item)
+        items = {(item.company_id, item.product_id): item for item in result.scalars().all()}
+        
+        for company_id, product_id, quantity, unit_cost in purchases:
+            inv_item = items.get((company_id, product_id))
+            total_cost = quantity * unit_cost
             
-            # Log WAC initialization
-            print(f"    📦 WAC INITIALIZATION: {product_id} | New Item Created | Buy: {quantity} @ ${unit_cost:.2f}")
-            print(f"    🧮 Initial WAC: ${unit_cost:.2f}")
+            if inv_item:
+                # Update WAC (Weighted Average Cost)
+                old_qty = inv_item.quantity
+                old_total = old_qty * inv_item.wac
+                new_total = old_total + total_cost
+                inv_item.quantity += quantity
+                inv_item.wac = new_total / inv_item.quantity
+                
+                # Log WAC calculation
+                if old_qty == 0:
+                     logs.append(f"    📦 WAC INITIALIZATION (First Stock): {product_id} | Buy: {quantity} @ ${unit_cost:.2f}")
+                     logs.append(f"    🧮 Initial WAC: ${inv_item.wac:.2f}")
+                else:
+                     logs.append(f"    📦 WAC UPDATE: {product_id} | Old WAC: ${old_total/old_qty:.2f} | New Buy: {quantity} @ ${unit_cost:.2f}")
+                     logs.append(f"    🧮 New WAC: ${new_total:.2f} / {inv_item.quantity} units = ${inv_item.wac:.2f}")
+            else:
+                # Create new inventory item
+                inv_item = InventoryItem(
+                    company_id=company_id,
+                    product_id=product_id,
+                    quantity=quantity,
+                    wac=unit_cost,
+                    warehouse_id=None  # TODO: assign to specific warehouse
+                )
+                self.db.add(inv_item)
+                items[(company_id, product_id)] = inv_item
+                
+                # Log WAC initialization
+                logs.append(f"    📦 WAC INITIALIZATION: {product_id} | New Item Created | Buy: {quantity} @ ${unit_cost:.2f}")
+                logs.append(f"    🧮 Initial WAC: ${unit_cost:.2f}")
         
-        await self.db.commit()
+        # Flush so later reads in this session see the stock; the caller owns the commit
+        await self.db.flush()
 
     async def _record_financial_snapshots(self, month: int, year: int, logs: List[str] = None):
         """Record financial state for all companies."""
-        from app.models import FinancialSnapshot, InventoryItem, Company, MarketHistory
         
         if logs is not None:
             title = "\n📈 FINANCIAL HEALTH SNAPSHOTS:"
-            print(title)
             logs.append(title)
             
-        result = await self.db.execute(select(Company))
-        companies = result.scalars().all()
+        result = await self.db.execute(select(Company.id, Company.name, Company.is_player))
+        companies = result.all()
+        
+        # Fetch ledger totals and inventory value for all companies up front
+        # (one grouped query each instead of several per company)
+        financials = await self.accounting.get_all_company_financials()
+        inv_result = await self.db.execute(
+            select(InventoryItem.company_id, func.sum(InventoryItem.quantity * InventoryItem.wac))
+            .group_by(InventoryItem.company_id)
+        )
+        inventory_values = {company_id: value or 0.0 for company_id, value in inv_result.all()}
+        empty_totals = {"cash": 0.0, "net_income": 0.0, "revenue": 0.0, "capital": 0.0}
+        
+        # Per-company lines for the analytical summary below, built from the same metrics
+        summary_lines = []
+        snapshot_rows = []
         
         for company in companies:
             # Calculate metrics
-            cash = await self.accounting.get_company_cash(company.id)
+            totals = financials.get(company.id, empty_totals)
+            cash = totals["cash"]
             
             # Calculate inventory value
-            inv_value = 0.0
-            inv_result = await self.db.execute(
-                select(InventoryItem).where(InventoryItem.company_id == company.id)
-            )
-            items = inv_result.scalars().all()
-            for item in items:
-                inv_value += item.quantity * item.wac
+            inv_value = inventory_values.get(company.id, 0.0)
             
             total_assets = cash + inv_value
             total_equity = total_assets # Simplify: Equity = Assets (assuming 0 liabilities)
             
             # Calculate Cumulative Profit (Net Income)
-            net_income = await self.accounting.get_monthly_net_income(company.id)
+            net_income = totals["net_income"]
             
             # --- New: Calculate Profit Margin & ROI ---
-            # Need Revenue and Equity/Capital base
-            
-            # Get Revenue sum (Account type REVENUE or code 4xxx)
-            # Direct query for efficiency
-            stmt = (
-                select(func.sum(JournalEntry.amount))
-                .join(Account, Account.id == JournalEntry.account_id)
-                .where(Account.company_id == company.id)
-                .where(Account.type == "REVENUE") # Or code startswith '4'
-            )
-            revenue_val = (await self.db.execute(stmt)).scalar() or 0.0
-            # Revenue is Credit (negative), convert to + for ratio
-            revenue_abs = abs(revenue_val)
+            # Revenue is Credit (negative) in the ledger, use absolute value for ratio
+            revenue_abs = abs(totals["revenue"])
             
             profit_margin = 0.0
             if revenue_abs > 0:
                 profit_margin = (net_income / revenue_abs) * 100
                 
-            # ROI = Net Income / Total Investment (Owner's Capital)
-            # Fetch Capital Account (3000)
-            stmt_cap = (
-                 select(func.sum(JournalEntry.amount))
-                .join(Account, Account.id == JournalEntry.account_id)
-                .where(Account.company_id == company.id)
-                .where(Account.code.endswith("-3000"))
-            )
-            capital_val = (await self.db.execute(stmt_cap)).scalar() or 0.0
-            capital_abs = abs(capital_val)
+            # ROI = Net Income / Total Investment (Owner's Capital, account 3000)
+            capital_abs = abs(totals["capital"])
             
             roi = 0.0
             if capital_abs > 0:
@@ -574,17 +680,16 @@ class GameEngine:
                 
             # ------------------------------------------
             
-            snapshot = FinancialSnapshot(
-                company_id=company.id,
-                month=month,
-                year=year,
-                cash_balance=cash,
-                inventory_value=inv_value,
-                total_assets=total_assets,
-                total_equity=total_equity,
-                net_income=net_income
-            )
-            self.db.add(snapshot)
+            snapshot_rows.append({
+                "company_id": company.id,
+                "month": month,
+                "year": year,
+                "cash_balance": cash,
+                "inventory_value": inv_value,
+                "total_assets": total_assets,
+                "total_equity": total_equity,
+                "net_income": net_income
+            })
             
             if logs is not None:
                 # Add highlighting for player company to match dashboard focus
@@ -598,8 +703,37 @@ class GameEngine:
                     f"Total Profit=${net_income:,.2f} "
                     f"| Margin: {profit_margin:.1f}% | ROI: {roi:.1f}%"
                 )
-                print(log_msg)
                 logs.append(log_msg)
+                summary_lines.append(
+                    f"  [{company.name}] Cash: {cash:.2f} | Assets: {total_assets:.2f} | Profit: {net_income:.2f} "
+                    f"| Margin: {profit_margin:.1f}% | ROI: {roi:.1f}%"
+                )
+
+        # A re-run of the same turn (retry, double submit) usually reproduces the same
+        # figures; only rewrite this period's snapshots when they actually differ
+        snapshot_hash = hash(tuple(sorted(
+            (row["company_id"], row["cash_balance"], row["inventory_value"],
+             row["total_assets"], row["total_equity"], row["net_income"])
+            for row in snapshot_rows
+        )))
+        
+        unchanged = False
+        if self._last_snapshot_hash.get((month, year)) == snapshot_hash:
+            # Same figures as our last write; make sure the rows weren't removed since
+            count_res = await self.db.execute(
+                select(func.count(FinancialSnapshot.id))
+                .where(FinancialSnapshot.month == month, FinancialSnapshot.year == year)
+            )
+            unchanged = count_res.scalar() == len(snapshot_rows)
+        
+        if not unchanged:
+            await self.db.execute(
+                delete(FinancialSnapshot).where(FinancialSnapshot.month == month, FinancialSnapshot.year == year)
+            )
+            # Write all snapshots in a single executemany insert
+            if snapshot_rows:
+                await self.db.execute(insert(FinancialSnapshot), snapshot_rows)
+            self._last_snapshot_hash[(month, year)] = snapshot_hash
 
         # After all snapshots, generate a structured, AI-readable summary block
         if logs is not None:
@@ -609,64 +743,40 @@ class GameEngine:
             logs.append("-" * 50)
             
             # Re-fetch everything for a clean summary
-            from app.models import Product, CompanyProduct, MarketHistory
-            products_res = await self.db.execute(select(Product))
-            all_products = products_res.scalars().all()
+            products_res = await self.db.execute(select(Product.id, Product.name))
+            all_products = products_res.all()
+            
+            # Fetch the whole period's market history once and group it by product
+            history_res = await self.db.execute(
+                select(MarketHistory.product_id, Company.name, MarketHistory.price, MarketHistory.units_sold, MarketHistory.demand_captured)
+                .join(Company, Company.id == MarketHistory.company_id)
+                .where(MarketHistory.month == month, MarketHistory.year == year)
+                .order_by(MarketHistory.id)
+            )
+            history_by_product = defaultdict(list)
+            for product_id, company_name, price, units_sold, demand_captured in history_res.all():
+                history_by_product[product_id].append((company_name, price, units_sold, demand_captured))
             
             for p in all_products:
-                # Get history for this product
-                history_res = await self.db.execute(
-                    select(MarketHistory, Company)
-                    .join(Company, Company.id == MarketHistory.company_id)
-                    .where(MarketHistory.product_id == p.id, MarketHistory.month == month, MarketHistory.year == year)
-                )
-                history_data = history_res.all()
+                history_data = history_by_product.get(p.id, [])
                 
                 # Calculate metrics
-                total_p_units = sum(h.units_sold for h, c in history_data)
-                total_p_demand = sum(h.demand_captured for h, c in history_data)
-                avg_p_price = sum(h.price for h, c in history_data) / len(history_data) if history_data else 0
+                total_p_units = sum(units_sold for _, _, units_sold, _ in history_data)
+                total_p_demand = sum(demand for _, _, _, demand in history_data)
+                avg_p_price = sum(price for _, price, _, _ in history_data) / len(history_data) if history_data else 0
                 
                 logs.append(f"PRODUCT: {p.name}")
                 logs.append(f"  Avg Price: ${avg_p_price:.2f} | Total Demand: {int(total_p_demand)} | Total Sales: {total_p_units}")
                 
-                for h, company in history_data:
-                    share = (h.units_sold / total_p_units * 100) if total_p_units > 0 else 0
-                    logs.append(f"    [{company.name}] Price: {h.price:.2f} | Sales: {h.units_sold} | Share: {share:.1f}%")
+                logs.extend([
+                    f"    [{company_name}] Price: {price:.2f} | Sales: {units_sold} | "
+                    f"Share: {(units_sold / total_p_units * 100) if total_p_units > 0 else 0:.1f}%"
+                    for company_name, price, units_sold, _ in history_data
+                ])
 
             logs.append("-" * 50)
             logs.append("FINANCIAL SNAPSHOT (ALL COMPANIES):")
-            for company in companies:
-                cash = await self.accounting.get_company_cash(company.id)
-                net_income = await self.accounting.get_monthly_net_income(company.id)
-                inv_res = await self.db.execute(select(InventoryItem).where(InventoryItem.company_id == company.id))
-                inv_val = sum(item.quantity * item.wac for item in inv_res.scalars().all())
-                assets = cash + inv_val
-                
-                # --- Metrics Logic duplicated for summary ---
-                stmt_rev = (
-                    select(func.sum(JournalEntry.amount))
-                    .join(Account, Account.id == JournalEntry.account_id)
-                    .where(Account.company_id == company.id)
-                    .where(Account.type == "REVENUE")
-                )
-                revenue_val = (await self.db.execute(stmt_rev)).scalar() or 0.0
-                revenue_abs = abs(revenue_val)
-                
-                stmt_cap = (
-                     select(func.sum(JournalEntry.amount))
-                    .join(Account, Account.id == JournalEntry.account_id)
-                    .where(Account.company_id == company.id)
-                    .where(Account.code.endswith("-3000"))
-                )
-                capital_val = (await self.db.execute(stmt_cap)).scalar() or 0.0
-                capital_abs = abs(capital_val)
-                
-                margin = (net_income / revenue_abs * 100) if revenue_abs > 0 else 0.0
-                roi = (net_income / capital_abs * 100) if capital_abs > 0 else 0.0
-                # ---------------------------------------------
-                
-                logs.append(f"  [{company.name}] Cash: {cash:.2f} | Assets: {assets:.2f} | Profit: {net_income:.2f} | Margin: {margin:.1f}% | ROI: {roi:.1f}%")
+            logs.extend(summary_lines)
             logs.append("=" * 50 + "\n")
 
     async def _manage_player_branding(self, logs: List[str]):
@@ -731,16 +841,12 @@ class GameEngine:
             # Log it
             # We append to logs to show in the "Detailed turn processing logs"
             header = "\n📢 PLAYER MARKETING CAMPAIGN:"
-            print(header)
             logs.append(header)
             
             msg_budget = f"  💰 Marketing Budget: {budget_pct*100:.1f}% of available cash"
             msg_spend = f"  📉 Marketing Expense: ${spend:,.2f}"
             msg_impact = f"  📈 Brand Equity: {old_brand:.2f} → {player.brand_equity:.2f} (+{brand_boost:.2f})"
             
-            print(msg_budget)
-            print(msg_spend)
-            print(msg_impact)
             
             logs.append(msg_budget)
             logs.append(msg_spend)
@@ -774,29 +880,24 @@ class GameEngine:
             return
             
         header = "\n👤 PLAYER PERFORMANCE REPORT:"
-        print(header)
         logs.append(header)
         
         # 1. Brand Presence
         log_brand = f"  🌐 Brand Presence: {player.brand_equity:.2f}x Multiplier"
-        print(log_brand)
         logs.append(log_brand)
         
         # 2. Market Advantage context
         advantage = (player.brand_equity - 1.0) * 100
         if advantage > 0:
             msg = f"     (You have a +{advantage:.1f}% advantage in attracting demand vs. equal priced competitors)"
-            print(msg)
             logs.append(msg)
         else:
              msg = f"     (Standard market presence. Invest in marketing to grow this.)"
-             print(msg)
              logs.append(msg)
              
         # 3. Quick Financial Health Check (Redundant but good for summary)
         cash = await self.accounting.get_company_cash(player.id)
         msg_cash = f"  💰 Cash on Hand: ${cash:,.2f}"
-        print(msg_cash)
         logs.append(msg_cash)
 
     async def _apply_brand_decay(self, logs: List[str] = None):
@@ -806,7 +907,6 @@ class GameEngine:
         
         if logs is not None:
             title = "\n📉 BRAND EQUITY DECAY:"
-            print(title)
             logs.append(title)
             
         for company in companies:
@@ -818,7 +918,6 @@ class GameEngine:
                 
                 if logs is not None:
                     msg = f"    {company.name}: {old_brand:.2f} → {company.brand_equity:.2f} (-{decay_amt:.2f} decay)"
-                    print(msg)
                     logs.append(msg)
 
     async def _record_brand_report(self, logs: List[str]):
@@ -827,7 +926,6 @@ class GameEngine:
         companies = result.scalars().all()
         
         header = "\n🏆 MARKET COMPETITIVENESS & BRANDING:"
-        print(header)
         logs.append(header)
         
         for company in companies:
@@ -835,7 +933,6 @@ class GameEngine:
             # Advantage = (Brand Equity - 1.0) * 100%
             advantage = (company.brand_equity - 1.0) * 100
             msg = f"  - {company.name}: Brand Equity {company.brand_equity:.2f} ({advantage:+.1f}% Market Weight Advantage)"
-            print(msg)
             logs.append(msg)
 
     async def _record_strategy_evolution(self, logs: List[str]):
@@ -844,19 +941,30 @@ class GameEngine:
         bots = result.scalars().all()
         
         header = "\n🧠 STRATEGY EVOLUTION REPORT:"
-        print(header)
         logs.append(header)
         
-        from core.bot_ai import BotAI
         bot_ai = BotAI(self.db)
         
+        # Resolve names for every remembered stockout (across all bots) in one query
+        stockout_ids = {
+            int(pid)
+            for bot in bots if bot.strategy_memory
+            for pid, count in bot.strategy_memory.get("stockouts", {}).items()
+            if count >= 1.0
+        }
+        product_names = {}
+        if stockout_ids:
+            result = await self.db.execute(
+                select(Product.id, Product.name).where(Product.id.in_(stockout_ids))
+            )
+            product_names = dict(result.all())
+        
         for bot in bots:
             personality = bot_ai._get_personality(bot)
             memory = bot.strategy_memory
             
             if not memory:
                 msg = f"  {bot.name} ({personality}): No history yet."
-                print(msg)
                 logs.append(msg)
                 continue
                 
@@ -871,12 +979,10 @@ class GameEngine:
             total_waste = sum(waste.values())
             
             msg_header = f"  {bot.name} ({personality} strategy):"
-            print(msg_header)
             logs.append(msg_header)
 
             # Log Brand Equity
             log_brand = f"    🌐 Brand Presence: {bot.brand_equity:.2f}x Multiplier"
-            print(log_brand)
             logs.append(log_brand)
             
             # Check for problems
@@ -885,39 +991,33 @@ class GameEngine:
             if total_stockouts > 0:
                 has_problems = True
                 # Format stockout details
-                details = []
-                for pid, count in stockouts.items():
-                    if count >= 1.0: # Filter out decayed fractional values
-                        # Get product name (inefficient but safe)
-                        prod_res = await self.db.execute(select(Product).where(Product.id == int(pid)))
-                        prod = prod_res.scalar_one()
-                        details.append(f"{prod.name}: {count:.1f}x")
+                details = [
+                    f"{product_names[int(pid)]}: {count:.1f}x"
+                    for pid, count in stockouts.items()
+                    if count >= 1.0  # Filter out decayed fractional values
+                ]
                 
                 if details:
                     msg_mem = f"    ⚠️  Stockout Memory: {', '.join(details)}"
-                    print(msg_mem)
                     logs.append(msg_mem)
 
             if total_regret > 0:
                 has_problems = True
                 affected_prods = len(regrets)
                 msg_regret = f"    📉 Pricing Errors: Detected in {affected_prods} products ({int(total_regret)} cumulative instances)."
-                print(msg_regret)
                 logs.append(msg_regret)
 
             if total_waste > 0:
                 has_problems = True
                 msg_waste = f"    🗑️  Inventory Waste: Sluggish movement detected in {int(total_waste)} instances."
-                print(msg_waste)
                 logs.append(msg_waste)
             
             if not has_problems:
                 msg_smooth = "    ✅ Operations: Smooth (No stockouts, waste, or pricing errors)"
-                print(msg_smooth)
                 logs.append(msg_smooth)
             
             # Show active adaptations
-            adjustments = await bot_ai._apply_learned_adjustments(bot, personality, logs=[])
+            adjustments = await bot_ai._apply_learned_adjustments(bot, personality)
             
             safety = adjustments.get("safety_stock_multiplier", 1.0)
             margin = adjustments.get("margin_offset", 0.0)
@@ -932,11 +1032,9 @@ class GameEngine:
                 if marketing != 0.0:
                     drift_msg += f" Marketing {marketing:+.0%} |"
                 
-                print(drift_msg)
                 logs.append(drift_msg)
             else:
                 msg_stable = "    ✅ Strategy Stable (No active adaptations)"
-                print(msg_stable)
                 logs.append(msg_stable)
 
     async def _log_general_ledger(self, logs: List[str]):
@@ -946,30 +1044,31 @@ class GameEngine:
         This outputs a structured table of all account balances and verifies 
         the fundamental accounting equation (Debits = Credits).
         """
-        from app.models import Account
-        from sqlalchemy import select
         
         header = "\n📒 GENERAL LEDGER REPORT (Trial Balance):"
-        print(header)
         logs.append(header)
         
         # Get all companies
         result = await self.db.execute(select(Company))
         companies = result.scalars().all()
         
+        # Get every account and its balance up front (one query each)
+        acc_result = await self.db.execute(select(Account).order_by(Account.code))
+        accounts_by_company: Dict[int, List[Account]] = defaultdict(list)
+        for acc in acc_result.scalars().all():
+            accounts_by_company[acc.company_id].append(acc)
+        balances = await self.accounting.get_balances_for_accounts(
+            [acc.id for accounts in accounts_by_company.values() for acc in accounts]
+        )
+        
         for company in companies:
             # Highlight player company
             prefix = "⭐ " if company.is_player else "  "
             type_label = "(PLAYER)" if company.is_player else "(BOT)"
             company_header = f"{prefix}{company.name} {type_label}"
-            print(company_header)
             logs.append(company_header)
             
-            # Get accounts
-            acc_result = await self.db.execute(
-                select(Account).where(Account.company_id == company.id).order_by(Account.code)
-            )
-            accounts = acc_result.scalars().all()
+            accounts = accounts_by_company[company.id]
             
             # Track totals for verification
             total_debits = 0.0
@@ -977,13 +1076,11 @@ class GameEngine:
             
             # Header row for clarity
             table_header = "    Code | Account Name              | Type      | Balance"
-            print(table_header)
             logs.append(table_header)
             logs.append("    " + "-" * 60)
             
             for acc in accounts:
-                # Calculate balance dynamically
-                balance = await self.accounting.get_account_balance(acc.id)
+                balance = balances[acc.id]
                 
                 if balance == 0:
                     continue
@@ -997,22 +1094,16 @@ class GameEngine:
                 # So if balance is positive, it's a Debit balance. If negative, Credit balance.
                 
                 line = f"    {acc.code:<4} | {acc.name:<25} | {acc.type:<9} | ${balance:,.2f}"
-                print(line)
                 logs.append(line)
             
             # Verify accounting equation
-            # We need to fetch balances for ALL accounts to sum them up correctly
             # (The loop above skips 0 balances, but that's fine for sum)
-            net_balance = 0.0
-            for acc in accounts:
-                 net_balance += await self.accounting.get_account_balance(acc.id)
+            net_balance = sum(balances[acc.id] for acc in accounts)
             
             # Status check
             status_icon = "✅" if abs(net_balance) < 0.01 else "❌"
             status_msg = "BALANCED" if abs(net_balance) < 0.01 else f"IMBALANCED ({net_balance})"
             
             summary = f"    {status_icon} Net Verification: ${net_balance:.2f} -> {status_msg}"
-            print(summary)
             logs.append(summary)
-            print("    " + "=" * 60)
             logs.append("    " + "=" * 60)
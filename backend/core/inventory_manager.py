@@ -9,7 +9,7 @@ from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from app.models import MarketHistory, InventoryItem, Product
-import statistics
+import math
 
 
 class InventoryManager:
@@ -31,51 +31,75 @@ class InventoryManager:
         Forecast future demand using weighted moving average of historical sales.
         If events_engine is provided, applies current market modifiers (seasonality, economic).
         """
-        # Get historical sales data
-        result = await self.db.execute(
-            select(MarketHistory)
+        forecasts = await self.forecast_demand_bulk(company_id, [product_id], periods_back, events_engine)
+        return forecasts[product_id]
+    
+    async def forecast_demand_bulk(
+        self,
+        company_id: int,
+        product_ids: List[int],
+        periods_back: int = 3,
+        events_engine=None
+    ) -> Dict[int, float]:
+        """
+        Forecast demand for several products of one company (see forecast_demand).
+        
+        Returns:
+            Dict mapping product_id to forecast units
+        """
+        # Weighted moving average of historical sales per product, computed in SQL
+        # (recent periods weighted higher: most recent gets weight 3, then 2, then 1)
+        recent = (
+            select(
+                MarketHistory.product_id,
+                MarketHistory.demand_captured,
+                func.row_number().over(
+                    partition_by=MarketHistory.product_id,
+                    order_by=(MarketHistory.year.desc(), MarketHistory.month.desc())
+                ).label("rn")
+            )
             .where(MarketHistory.company_id == company_id)
-            .where(MarketHistory.product_id == product_id)
-            .order_by(MarketHistory.year.desc(), MarketHistory.month.desc())
-            .limit(periods_back)
+            .where(MarketHistory.product_id.in_(product_ids))
+            .subquery()
         )
-        history = result.scalars().all()
-        
-        forecast = 0.0
+        weight = 4 - recent.c.rn
+        result = await self.db.execute(
+            select(recent.c.product_id, func.sum(recent.c.demand_captured * weight) / func.sum(weight))
+            .where(recent.c.rn <= min(periods_back, 3))
+            .group_by(recent.c.product_id)
+        )
+        forecasts = {product_id: forecast for product_id, forecast in result.all() if forecast is not None}
         
-        if not history:
+        missing = [product_id for product_id in product_ids if product_id not in forecasts]
+        if missing:
             # No history - use market average demand
             avg_result = await self.db.execute(
-                select(func.avg(MarketHistory.demand_captured))
-                .where(MarketHistory.product_id == product_id)
+                select(MarketHistory.product_id, func.avg(MarketHistory.demand_captured))
+                .where(MarketHistory.product_id.in_(missing))
+                .group_by(MarketHistory.product_id)
             )
-            forecast = avg_result.scalar() or 300.0
-        else:
-            # Weighted moving average (recent periods weighted higher)
-            weights = [3, 2, 1][:len(history)]  # Most recent gets weight 3
-            total_weight = sum(weights)
-            
-            weighted_demand = sum(
-                h.demand_captured * weights[i] 
-                for i, h in enumerate(history)
-            )
-            
-            forecast = weighted_demand / total_weight
+            market_avgs = dict(avg_result.all())
+            for product_id in missing:
+                forecasts[product_id] = market_avgs.get(product_id) or 300.0
             
         # Apply market modifiers if engine provided
         if events_engine:
-            # Need product name for specific event matching
+            # Need product names for specific event matching
             p_result = await self.db.execute(
-                select(Product.name).where(Product.id == product_id)
+                select(Product.id, Product.name).where(Product.id.in_(product_ids))
             )
-            product_name = p_result.scalar_one_or_none()
+            product_names = dict(p_result.all())
             
-            if product_name:
-                # Apply modifiers (Seasonality, Economy, etc.)
-                # this returns (adjusted_demand, modifiers_dict)
-                forecast, _ = await events_engine.apply_demand_modifiers(forecast, product_name)
+            if product_names:
+                # Apply modifiers (Seasonality, Economy, etc.) to every product at once
+                # this returns {product_name: (adjusted_demand, modifiers_dict)}
+                adjusted = await events_engine.apply_demand_modifiers_bulk({
+                    product_name: forecasts[product_id] for product_id, product_name in product_names.items()
+                })
+                for product_id, product_name in product_names.items():
+                    forecasts[product_id] = adjusted[product_name][0]
                 
-        return forecast
+        return {product_id: forecasts[product_id] for product_id in product_ids}
     
     async def calculate_safety_stock(
         self, 
@@ -91,26 +115,62 @@ class InventoryManager:
         Returns:
             Safety stock quantity (units)
         """
-        # Get historical demand captured
-        result = await self.db.execute(
-            select(MarketHistory.demand_captured)
+        safety_stocks = await self.calculate_safety_stock_bulk(company_id, [product_id], periods_back)
+        return safety_stocks[product_id]
+    
+    async def calculate_safety_stock_bulk(
+        self,
+        company_id: int,
+        product_ids: List[int],
+        periods_back: int = 3
+    ) -> Dict[int, float]:
+        """
+        Calculate safety stock for several products of one company (see calculate_safety_stock).
+        
+        Returns:
+            Dict mapping product_id to safety stock units
+        """
+        # Get the most recent periods of demand captured per product
+        recent = (
+            select(
+                MarketHistory.product_id,
+                MarketHistory.demand_captured,
+                func.row_number().over(
+                    partition_by=MarketHistory.product_id,
+                    order_by=(MarketHistory.year.desc(), MarketHistory.month.desc())
+                ).label("rn")
+            )
             .where(MarketHistory.company_id == company_id)
-            .where(MarketHistory.product_id == product_id)
-            .order_by(MarketHistory.year.desc(), MarketHistory.month.desc())
-            .limit(periods_back)
+            .where(MarketHistory.product_id.in_(product_ids))
+            .subquery()
         )
-        demands = [row[0] for row in result.all()]
-        
-        if len(demands) < 2:
-            # Not enough history - use 20% of forecast as buffer
-            forecast = await self.forecast_demand(company_id, product_id, periods_back)
-            return forecast * 0.2
+        result = await self.db.execute(
+            select(recent.c.product_id, recent.c.demand_captured)
+            .where(recent.c.rn <= periods_back)
+        )
+        demands_by_product: Dict[int, List[float]] = {product_id: [] for product_id in product_ids}
+        for product_id, demand in result.all():
+            demands_by_product[product_id].append(demand)
         
-        # Calculate standard deviation
-        std_dev = statistics.stdev(demands)
-        safety_stock = self.service_level_z * std_dev
+        # Not enough history - use 20% of forecast as buffer
+        short = [product_id for product_id, demands in demands_by_product.items() if len(demands) < 2]
+        forecasts = await self.forecast_demand_bulk(company_id, short, periods_back) if short else {}
         
-        return max(safety_stock, 0)
+        safety_stocks = {}
+        for product_id, demands in demands_by_product.items():
+            if product_id in forecasts:
+                safety_stocks[product_id] = forecasts[product_id] * 0.2
+                continue
+            
+            # Calculate sample standard deviation in floats (statistics.stdev does exact
+            # rational arithmetic on the integer demands, which is far slower)
+            n = len(demands)
+            mean = sum(demands) / n
+            std_dev = math.sqrt(sum((d - mean) ** 2 for d in demands) / (n - 1))
+            safety_stock = self.service_level_z * std_dev
+            
+            safety_stocks[product_id] = max(safety_stock, 0)
+        return safety_stocks
     
     async def get_current_inventory(
         self, 
@@ -118,20 +178,28 @@ class InventoryManager:
         product_id: int
     ) -> int:
         """Get current inventory quantity for a product."""
+        inventories = await self.get_current_inventory_bulk(company_id, [product_id])
+        return inventories[product_id]
+    
+    async def get_current_inventory_bulk(
+        self,
+        company_id: int,
+        product_ids: List[int]
+    ) -> Dict[int, int]:
+        """Get current inventory quantity for several products (0 where none is held)."""
         result = await self.db.execute(
-            select(InventoryItem.quantity)
+            select(InventoryItem.product_id, InventoryItem.quantity)
             .where(InventoryItem.company_id == company_id)
-            .where(InventoryItem.product_id == product_id)
+            .where(InventoryItem.product_id.in_(product_ids))
         )
-        quantity = result.scalar()
-        return quantity if quantity is not None else 0
+        inventories = dict.fromkeys(product_ids, 0)
+        for product_id, quantity in result.all():
+            if quantity is not None:
+                inventories[product_id] = quantity
+        return inventories
     
-    async def get_reorder_quantity(
-        self, 
-        company_id: int, 
-        product_id: int,
-        events_engine=None  # New param
-    ) -> int:
+    @staticmethod
+    def reorder_quantity(forecast: float, safety_stock: float, current_inv: int) -> int:
         """
         Calculate recommended reorder quantity.
         
@@ -140,11 +208,6 @@ class InventoryManager:
         Returns:
             Recommended order quantity (units), minimum 0
         """
-        # Pass events_engine to forecast for context-aware prediction
-        forecast = await self.forecast_demand(company_id, product_id, events_engine=events_engine)
-        safety_stock = await self.calculate_safety_stock(company_id, product_id)
-        current_inv = await self.get_current_inventory(company_id, product_id)
-        
         # Target inventory = forecast + safety stock
         target_inventory = forecast + safety_stock
         
@@ -154,6 +217,47 @@ class InventoryManager:
         # Don't order if we have enough
         return max(int(reorder_qty), 0)
     
+    async def get_reorder_quantity(
+        self, 
+        company_id: int, 
+        product_id: int,
+        events_engine=None  # New param
+    ) -> int:
+        """
+        Calculate recommended reorder quantity.
+        
+        Formula: reorder_qty = forecast + safety_stock - current_inventory
+        
+        Returns:
+            Recommended order quantity (units), minimum 0
+        """
+        quantities = await self.get_reorder_quantities(company_id, [product_id], events_engine)
+        return quantities[product_id]
+    
+    async def get_reorder_quantities(
+        self,
+        company_id: int,
+        product_ids: List[int],
+        events_engine=None
+    ) -> Dict[int, int]:
+        """
+        Calculate recommended reorder quantities for several products of one company.
+        
+        Returns:
+            Dict mapping product_id to recommended order quantity (units), minimum 0
+        """
+        # Pass events_engine to forecast for context-aware prediction
+        forecasts = await self.forecast_demand_bulk(company_id, product_ids, events_engine=events_engine)
+        safety_stocks = await self.calculate_safety_stock_bulk(company_id, product_ids)
+        inventories = await self.get_current_inventory_bulk(company_id, product_ids)
+        
+        return {
+            product_id: self.reorder_quantity(
+                forecasts[product_id], safety_stocks[product_id], inventories[product_id]
+            )
+            for product_id in product_ids
+        }
+    
     async def calculate_turnover(
         self, 
         company_id: int, 
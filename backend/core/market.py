@@ -4,19 +4,63 @@ Market Demand and Sales Engine for Ledger Tycoon
 Simulates market demand, price elasticity, and competitive dynamics.
 """
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 import random
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert
 from app.models import Company, Product, CompanyProduct, MarketHistory
 
+def distribute_units(
+    prices: List[float],
+    brand_equities: List[float],
+    total_demand: float,
+    price_elasticity: float
+) -> List[float]:
+    """
+    Pure numeric core of sales distribution.
+    
+    Uses inverse price weighting scaled by brand equity, then applies price
+    elasticity against the market average price. Returns units sold per seller,
+    in the same order as the inputs.
+    """
+    # Weight formula: (1 / price) * brand_equity
+    # This means twice the brand equity = twice the market share at same price
+    weights = [(1 / price) * brand_equity for price, brand_equity in zip(prices, brand_equities)]
+    total_weight = sum(weights)
+    avg_price = sum(prices) / len(prices)
+    
+    units = []
+    for price, weight in zip(prices, weights):
+        # Market share = weight / total_weight
+        market_share = weight / total_weight
+        
+        # Apply price elasticity
+        # If price is much higher than average, reduce demand
+        price_factor = 1 - ((price - avg_price) / avg_price) * price_elasticity
+        price_factor = max(0.1, min(1.5, price_factor))  # Clamp between 0.1 and 1.5
+        
+        # Calculate units sold
+        units.append(max(0, total_demand * market_share * price_factor))
+    return units
+
 class MarketEngine:
     """Handles market demand calculation and sales distribution."""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, seed: Optional[int] = None):
         self.db = db
         self.base_demand = 1000  # Base market demand per product per month
         self.price_elasticity = 0.5  # How sensitive demand is to price changes
+        # Pass a seed for reproducible demand (e.g. in tests or replays).
+        self._rng = random.Random(seed)
+        # product_id -> name, loaded for all products on first use (products don't change mid-game)
+        self._product_names: Dict[int, str] = {}
+    
+    async def _get_product_name(self, product_id: int) -> str:
+        """Look up a product name, loading every product name in one query on a miss."""
+        if product_id not in self._product_names:
+            result = await self.db.execute(select(Product.id, Product.name))
+            self._product_names = dict(result.all())
+        return self._product_names[product_id]
     
     async def calculate_market_demand(
         self, 
@@ -36,21 +80,15 @@ class MarketEngine:
         if logs is None:
             logs = []
             
-        # Get product
-        result = await self.db.execute(
-            select(Product).where(Product.id == product_id)
-        )
-        product = result.scalar_one()
-        
         # Base demand with small random variation
-        random_variation = random.uniform(0.9, 1.1)
+        random_variation = self._rng.uniform(0.9, 1.1)
         base_demand = self.base_demand * random_variation
         
         # Apply market event modifiers if engine provided
         if events_engine:
             final_demand, modifiers = await events_engine.apply_demand_modifiers(
                 base_demand, 
-                product.name
+                await self._get_product_name(product_id)
             )
             
             # Log demand calculation breakdown
@@ -77,7 +115,7 @@ class MarketEngine:
         self, 
         product_id: int, 
         total_demand: float
-    ) -> Dict[int, float]:
+    ) -> Dict[int, int]:
         """
         Distribute sales among companies based on pricing.
         
@@ -86,50 +124,29 @@ class MarketEngine:
         - Companies with no inventory get 0 sales
         
         Returns:
-            Dict mapping company_id to units_sold
+            Dict mapping company_id to units_sold, truncated to whole units
         """
-        # Get all companies selling this product
+        # Get all companies selling this product, with the brand equity that weights their share
         result = await self.db.execute(
-            select(CompanyProduct)
+            select(CompanyProduct.company_id, CompanyProduct.price, Company.brand_equity)
+            .join(Company, Company.id == CompanyProduct.company_id)
             .where(CompanyProduct.product_id == product_id)
             .where(CompanyProduct.price > 0)  # Only active sellers
         )
-        company_products = result.scalars().all()
+        rows = result.all()
         
-        if not company_products:
+        if not rows:
             return {}
         
-        # Calculate market shares using inverse price weighting AND Brand Equity
-        # Higher brand equity = higher weight
-        # Lower price = higher weight
-        weights = {}
-        for cp in company_products:
-            # We need to get the company for brand_equity
-            result = await self.db.execute(
-                select(Company).where(Company.id == cp.company_id)
-            )
-            company = result.scalar_one()
-            
-            # Weight formula: (1 / price) * brand_equity
-            # This means twice the brand equity = twice the market share at same price
-            weights[cp.company_id] = (1 / cp.price) * company.brand_equity
-            
-        total_weight = sum(weights.values())
-        
-        sales_distribution = {}
-        for cp in company_products:
-            # Market share = weight / total_weight
-            market_share = weights[cp.company_id] / total_weight
-            
-            # Apply price elasticity
-            # If price is much higher than average, reduce demand
-            avg_price = sum(cp2.price for cp2 in company_products) / len(company_products)
-            price_factor = 1 - ((cp.price - avg_price) / avg_price) * self.price_elasticity
-            price_factor = max(0.1, min(1.5, price_factor))  # Clamp between 0.1 and 1.5
-            
-            # Calculate units sold
-            units_sold = total_demand * market_share * price_factor
-            sales_distribution[cp.company_id] = max(0, units_sold)
+        units = distribute_units(
+            [price for _, price, _ in rows],
+            [brand_equity for _, _, brand_equity in rows],
+            total_demand,
+            self.price_elasticity
+        )
+        sales_distribution = {
+            company_id: int(units_sold) for (company_id, _, _), units_sold in zip(rows, units)
+        }
         
         return sales_distribution
     
@@ -145,28 +162,54 @@ class MarketEngine:
         logs: List[str] = None
     ):
         """Process sales for a product across all companies."""
-        from app.models import InventoryItem, CompanyProduct, MarketHistory
+        from app.models import InventoryItem, CompanyProduct, MarketHistory, Account
         from core.accounting import AccountingEngine
         
         if logs is None:
             logs = []
+        
+        accounting = AccountingEngine(db)
+        
+        # Lookup accounts for every selling company in one query
+        # (stored codes are prefixed with the company id: "{company_id}-{code}")
+        account_codes = ("1000", "4000", "1200", "5000")
+        result = await db.execute(
+            select(Account.company_id, Account.code, Account.id)
+            .where(Account.code.in_([
+                f"{company_id}-{code}" for company_id in sales_distribution for code in account_codes
+            ]))
+        )
+        account_ids = {
+            (company_id, full_code.split("-", 1)[1]): account_id
+            for company_id, full_code, account_id in result.all()
+        }
+        
+        # Get inventory (with lock) and CompanyProduct stats for every selling company up front
+        company_ids = list(sales_distribution)
+        result = await db.execute(
+            select(InventoryItem)
+            .where(InventoryItem.company_id.in_(company_ids))
+            .where(InventoryItem.product_id == product_id)
+            .order_by(InventoryItem.company_id)  # Deterministic lock order
+            .with_for_update()
+        )
+        inv_by_company = {item.company_id: item for item in result.scalars().all()}
+        result = await db.execute(
+            select(CompanyProduct)
+            .where(CompanyProduct.company_id.in_(company_ids))
+            .where(CompanyProduct.product_id == product_id)
+        )
+        cp_by_company = {cp.company_id: cp for cp in result.scalars().all()}
             
         total_unmet_demand = 0
         total_missed_revenue = 0.0
+        history_rows = []
         
-        for company_id, demand_units_float in sales_distribution.items():
-            demand_units = int(demand_units_float)
+        for company_id, demand_units in sales_distribution.items():
             if demand_units == 0:
                 continue
             
-            # Get inventory with lock
-            result = await db.execute(
-                select(InventoryItem)
-                .where(InventoryItem.company_id == company_id)
-                .where(InventoryItem.product_id == product_id)
-                .with_for_update()
-            )
-            inv_item = result.scalar_one_or_none()
+            inv_item = inv_by_company.get(company_id)
             
             units_sold = demand_units
             unmet_units = 0
@@ -184,7 +227,6 @@ class MarketEngine:
                 total_missed_revenue += missed_rev
                 
                 msg = f"        ⚠️  Insufficient inventory! Wanted {units_sold}, only had {actual_sold} (Missed Sales: {unmet_units} units, ${missed_rev:,.2f})"
-                print(msg)
                 logs.append(msg)
                 units_sold = actual_sold
             
@@ -192,87 +234,77 @@ class MarketEngine:
             price = company_prices[company_id]
             revenue = units_sold * price
             
-            # Record Market History
-            history_entry = MarketHistory(
-                company_id=company_id,
-                product_id=product_id,
-                month=month,
-                year=year,
-                price=price,
-                units_sold=units_sold,
-                revenue=revenue,
-                demand_captured=demand_units
-            )
-            db.add(history_entry)
+            # Record Market History (inserted for all companies after the loop)
+            history_rows.append({
+                "company_id": company_id,
+                "product_id": product_id,
+                "month": month,
+                "year": year,
+                "price": price,
+                "units_sold": units_sold,
+                "revenue": revenue,
+                "demand_captured": demand_units
+            })
 
             if units_sold == 0:
                 continue
 
             cogs = units_sold * inv_item.wac
             
-            msg_revenue = f"        💵 Revenue: {units_sold} × ${price:.2f} = ${revenue:,.2f}"
-            msg_cogs = f"        📊 COGS: {units_sold} × ${inv_item.wac:.2f} = ${cogs:,.2f}"
-            msg_profit = f"        💰 Gross Profit: ${revenue - cogs:,.2f}"
-            
-            print(msg_revenue)
-            print(msg_cogs)
-            print(msg_profit)
-            logs.append(msg_revenue)
-            logs.append(msg_cogs)
-            logs.append(msg_profit)
-            
             # Update inventory
             old_qty = inv_item.quantity
             inv_item.quantity -= units_sold
-            msg_inv = f"        📦 Inventory: {old_qty} → {inv_item.quantity} units"
-            print(msg_inv)
-            logs.append(msg_inv)
+            
+            logs.extend((
+                f"        💵 Revenue: {units_sold} × ${price:.2f} = ${revenue:,.2f}",
+                f"        📊 COGS: {units_sold} × ${inv_item.wac:.2f} = ${cogs:,.2f}",
+                f"        💰 Gross Profit: ${revenue - cogs:,.2f}",
+                f"        📦 Inventory: {old_qty} → {inv_item.quantity} units",
+            ))
             
             # Update CompanyProduct stats
-            result = await db.execute(
-                select(CompanyProduct)
-                .where(CompanyProduct.company_id == company_id)
-                .where(CompanyProduct.product_id == product_id)
-            )
-            cp = result.scalar_one()
+            cp = cp_by_company[company_id]
             cp.units_sold += units_sold
             cp.revenue += revenue
             
             # Record accounting transactions
-            accounting = AccountingEngine(db)
-            
-            # Lookup accounts
-            cash_acc = await accounting._get_account_by_code(company_id, "1000")
-            revenue_acc = await accounting._get_account_by_code(company_id, "4000")
-            inventory_acc = await accounting._get_account_by_code(company_id, "1200")
-            cogs_acc = await accounting._get_account_by_code(company_id, "5000")
+            cash_acc_id = account_ids.get((company_id, "1000"))
+            revenue_acc_id = account_ids.get((company_id, "4000"))
+            inventory_acc_id = account_ids.get((company_id, "1200"))
+            cogs_acc_id = account_ids.get((company_id, "5000"))
             
             # Record revenue (Debit: Cash, Credit: Revenue)
             # Only record if we found the accounts
-            if cash_acc and revenue_acc:
-                await accounting.create_transaction(
+            if cash_acc_id and revenue_acc_id:
+                accounting.stage_transaction(
                     company_id=company_id,
                     description=f"Sales revenue - {units_sold} units",
                     entries=[
-                        (cash_acc.id, revenue),      # Debit Cash
-                        (revenue_acc.id, -revenue),  # Credit Revenue
+                        (cash_acc_id, revenue),      # Debit Cash
+                        (revenue_acc_id, -revenue),  # Credit Revenue
                     ]
                 )
-                logs.append(f"        💰 Financial Transaction: +${revenue:,.2f} added to Cash (Account {cash_acc.code})")
+                logs.append(f"        💰 Financial Transaction: +${revenue:,.2f} added to Cash (Account {company_id}-1000)")
 
             # Record COGS (Debit: COGS, Credit: Inventory)
-            if cogs_acc and inventory_acc:
-                await accounting.create_transaction(
+            if cogs_acc_id and inventory_acc_id:
+                accounting.stage_transaction(
                     company_id=company_id,
                     description=f"Cost of goods sold - {units_sold} units",
                     entries=[
-                        (cogs_acc.id, cogs),          # Debit COGS
-                        (inventory_acc.id, -cogs),    # Credit Inventory
+                        (cogs_acc_id, cogs),          # Debit COGS
+                        (inventory_acc_id, -cogs),    # Credit Inventory
                     ]
                 )
+        
+        # One executemany insert for the market history rows
+        if history_rows:
+            await db.execute(insert(MarketHistory), history_rows)
+        
+        # Write every staged posting and stock change in one flush
+        await db.flush()
                 
         # Log Summary of Missed Opportunities
         if total_unmet_demand > 0:
             msg_missed = f"    📉 Market Opportunity Lost: {total_unmet_demand} units unmet demand (Potential Revenue: ${total_missed_revenue:,.2f})"
-            print(msg_missed)
             logs.append(msg_missed)
@@ -11,7 +11,7 @@ import json
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass, field
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, insert, update, delete
 from app.models import MarketEvent, Product, Company
 
 
@@ -161,6 +161,16 @@ DECISION_EVENT_TEMPLATES = [
     )
 ]
 
+# Season name by month (index 0 unused so months index directly)
+SEASON_NAMES = (
+    "",
+    "Winter", "Winter",            # Jan, Feb
+    "Spring", "Spring", "Spring",  # Mar-May
+    "Summer", "Summer", "Summer",  # Jun-Aug
+    "Fall", "Fall", "Fall",        # Sep-Nov
+    "Winter",                      # Dec
+)
+
 
 class MarketEventsEngine:
     """Manages market events and their effects on demand and costs."""
@@ -187,6 +197,12 @@ class MarketEventsEngine:
         ]
     }
     
+    # Reverse lookup: event type -> {intensity: level index}
+    INTENSITY_LEVEL_INDEX = {
+        event_type: {level["intensity"]: i for i, level in enumerate(levels)}
+        for event_type, levels in ECONOMIC_INTENSITY_LEVELS.items()
+    }
+    
     # Seasonal demand modifiers by product name and month
     SEASONAL_PATTERNS = {
         # Spring (Mar-May): Widgets +20%, Tools +10%
@@ -210,21 +226,26 @@ class MarketEventsEngine:
         2: {"Basic Widget": 1.15, "Premium Gadget": 0.85},
     }
     
-    def __init__(self, db: AsyncSession, current_month: int, current_year: int):
+    def __init__(self, db: AsyncSession, current_month: int, current_year: int, seed: Optional[int] = None):
         self.db = db
         self.current_month = current_month
         self.current_year = current_year
+        # Pass a seed for reproducible event rolls (e.g. in tests or replays).
+        self._rng = random.Random(seed)
+        # Events active this tick, loaded on first use; reset whenever events are added or aged
+        self._events_cache: Optional[List[MarketEvent]] = None
         
     async def trigger_random_events(self) -> List[MarketEvent]:
         """
         Randomly trigger new market events.
         Returns list of newly created events.
         """
-        new_events = []
+        # New events are collected as rows and inserted together at the end
+        new_event_rows = []
         
         # 25% chance for economic event
-        if random.random() < 0.25:
-            event_type = random.choice(["ECONOMIC_BOOM", "RECESSION"])
+        if self._rng.random() < 0.25:
+            event_type = self._rng.choice(["ECONOMIC_BOOM", "RECESSION"])
             
             # Check for conflicting events (Different Type - e.g. Boom vs Recession)
             conflicting_events = await self.check_event_conflicts(event_type)
@@ -237,19 +258,19 @@ class MarketEventsEngine:
                 
                 # Start new event at Mild intensity
                 level_data = self.ECONOMIC_INTENSITY_LEVELS[event_type][0]
-                duration = random.randint(2, 4)
+                duration = self._rng.randint(2, 4)
                 
-                event = MarketEvent(
+                event_row = dict(
                     event_type=event_type,
                     start_month=self.current_month,
                     start_year=self.current_year,
                     duration_months=duration,
                     intensity=level_data["intensity"],
+                    affected_product_id=None,
                     description=f"{level_data['name']} {event_type.replace('_', ' ').title()}! Market demand x{level_data['intensity']} for {duration} months"
                 )
-                self.db.add(event)
-                new_events.append(event)
-                print(f"  🔄 ECONOMIC SHOCK: {event.description}")
+                new_event_rows.append(event_row)
+                print(f"  🔄 ECONOMIC SHOCK: {event_row['description']}")
             
             else:
                 # Check for SAME event type (Stacking/Worsening)
@@ -265,15 +286,7 @@ class MarketEventsEngine:
                     
                     # Find current level index
                     levels = self.ECONOMIC_INTENSITY_LEVELS[event_type]
-                    current_idx = -1
-                    
-                    # Find closest matching intensity level
-                    closest_diff = float('inf')
-                    for i, level in enumerate(levels):
-                        diff = abs(level["intensity"] - current_intensity)
-                        if diff < closest_diff:
-                            closest_diff = diff
-                            current_idx = i
+                    current_idx = self._intensity_level_index(event_type, current_intensity)
                     
                     # Worsen by 1 level if possible
                     new_idx = min(current_idx + 1, len(levels) - 1)
@@ -284,7 +297,7 @@ class MarketEventsEngine:
                     existing_event.intensity = new_level["intensity"]
                     
                     # Extend duration
-                    added_duration = random.randint(2, 4)
+                    added_duration = self._rng.randint(2, 4)
                     existing_event.duration_months += added_duration
                     
                     # Update description
@@ -298,9 +311,9 @@ class MarketEventsEngine:
                     # NEW EVENT (No conflict, no existing same type)
                     # Start at Moderate level for standard random events
                     level_data = self.ECONOMIC_INTENSITY_LEVELS[event_type][1] # Moderate
-                    duration = random.randint(2, 4)
+                    duration = self._rng.randint(2, 4)
                     
-                    event = MarketEvent(
+                    new_event_rows.append(dict(
                         event_type=event_type,
                         start_month=self.current_month,
                         start_year=self.current_year,
@@ -308,43 +321,68 @@ class MarketEventsEngine:
                         intensity=level_data["intensity"],
                         affected_product_id=None,
                         description=f"{level_data['name']} {event_type.replace('_', ' ').title()}. Market demand x{level_data['intensity']} for {duration} months"
-                    )
-                    self.db.add(event)
-                    new_events.append(event)
+                    ))
         
         # 15% chance for supply chain disruption
-        if random.random() < 0.15:
-            # Get all products
-            result = await self.db.execute(select(Product))
-            products = result.scalars().all()
+        if self._rng.random() < 0.15:
+            # Only the id and name are needed - skip hydrating full Product objects.
+            # The pick uses the engine's RNG so seeded runs stay reproducible.
+            result = await self.db.execute(select(Product.id, Product.name).order_by(Product.id))
+            products = result.all()
             
             if products:
-                affected_product = random.choice(products)
-                duration = random.randint(1, 2)
-                cost_increase = random.choice([1.20, 1.30])  # +20% or +30%
+                affected_product = self._rng.choice(products)
+                duration = self._rng.randint(1, 2)
+                cost_increase = self._rng.choice([1.20, 1.30])  # +20% or +30%
                 
-                event = MarketEvent(
+                new_event_rows.append(dict(
                     event_type="SUPPLY_DISRUPTION",
                     start_month=self.current_month,
                     start_year=self.current_year,
                     duration_months=duration,
                     intensity=cost_increase,
                     affected_product_id=affected_product.id,
-                    description=f"Supply Chain Disruption: {affected_product.name} costs +{int((cost_increase-1)*100)}% for {duration} month{'s' if duration > 1 else ''}"
-                )
-                self.db.add(event)
-                new_events.append(event)
+                    description=f"Supply Chain Disruption: {affected_product.name} costs +{round((cost_increase - 1) * 100)}% for {duration} month{'s' if duration > 1 else ''}"
+                ))
         
+        # Write cancelled/worsened events, then insert the new ones in a single
+        # INSERT ... RETURNING (a flush issues one INSERT per added object)
         await self.db.flush()
+        new_events = []
+        if new_event_rows:
+            result = await self.db.scalars(
+                insert(MarketEvent).returning(MarketEvent),
+                new_event_rows,
+                # Keep the None product ids so economic and supply rows share one statement
+                execution_options={"render_nulls": True}
+            )
+            new_events = list(result.all())
+        self.invalidate_events_cache()
         return new_events
     
+    def _intensity_level_index(self, event_type: str, intensity: float) -> int:
+        """Index of an economic event's intensity level (closest level if it's off the table)."""
+        index = self.INTENSITY_LEVEL_INDEX[event_type].get(intensity)
+        if index is None:
+            levels = self.ECONOMIC_INTENSITY_LEVELS[event_type]
+            index = min(range(len(levels)), key=lambda i: abs(levels[i]["intensity"] - intensity))
+        return index
+    
+    def invalidate_events_cache(self) -> None:
+        """Drop the cached active events, e.g. after adding events through another path."""
+        self._events_cache = None
+    
     async def get_active_events(self) -> List[MarketEvent]:
-        """Get all active market events."""
-        result = await self.db.execute(
-            select(MarketEvent)
-            .where(MarketEvent.duration_months > 0)
-        )
-        return result.scalars().all()
+        """Get all active market events (queried once per tick, then served from memory)."""
+        if self._events_cache is None:
+            result = await self.db.execute(
+                select(MarketEvent)
+                .where(MarketEvent.duration_months > 0)
+                .order_by(MarketEvent.id)
+            )
+            self._events_cache = list(result.scalars().all())
+        # Re-check duration so events cancelled during the tick drop out
+        return [event for event in self._events_cache if event.duration_months > 0]
     
     async def check_event_conflicts(self, new_event_type: str) -> List[MarketEvent]:
         """
@@ -391,17 +429,11 @@ class MarketEventsEngine:
                 continue
                 
             # Evolution Logic
-            roll = random.random()
+            roll = self._rng.random()
             levels = self.ECONOMIC_INTENSITY_LEVELS[event.event_type]
             
             # Find current level index
-            current_idx = -1
-            closest_diff = float('inf')
-            for i, level in enumerate(levels):
-                diff = abs(level["intensity"] - event.intensity)
-                if diff < closest_diff:
-                    closest_diff = diff
-                    current_idx = i
+            current_idx = self._intensity_level_index(event.event_type, event.intensity)
             
             original_intensity = event.intensity
             
@@ -430,22 +462,22 @@ class MarketEventsEngine:
     
     async def update_event_durations(self):
         """Decrement duration of all active events and clean up expired ones."""
-        result = await self.db.execute(
-            select(MarketEvent)
-            .where(MarketEvent.duration_months > 0)
-        )
-        events = result.scalars().all()
-        
-        for event in events:
-            event.duration_months -= 1
+        self.invalidate_events_cache()
         
-        # Flush the decrements first
+        # Write pending changes (cancellations, evolved intensities) before the bulk statements
         await self.db.flush()
         
-        # Now delete expired events (duration <= 0)
+        # Delete events that expire this month (and cancelled ones) before aging,
+        # so rows about to be removed aren't rewritten first
         await self.db.execute(
             delete(MarketEvent)
-            .where(MarketEvent.duration_months <= 0)
+            .where(MarketEvent.duration_months <= 1)
+        )
+        
+        # Decrement everything that remains in one set-based UPDATE
+        await self.db.execute(
+            update(MarketEvent)
+            .values(duration_months=MarketEvent.duration_months - 1)
         )
         
         await self.db.flush()
@@ -457,28 +489,49 @@ class MarketEventsEngine:
     
     async def get_economic_modifier(self) -> float:
         """Get current economic modifier (from booms/recessions)."""
-        result = await self.db.execute(
-            select(MarketEvent)
-            .where(MarketEvent.event_type.in_(["ECONOMIC_BOOM", "RECESSION"]))
-            .where(MarketEvent.duration_months > 0)
-            .limit(1)  # Only get the first active economic event
-        )
-        event = result.scalar_one_or_none()
+        modifiers = await self.get_all_active_modifiers(product_ids=[])
+        return modifiers["economic"]
+    
+    async def get_all_active_modifiers(self, product_ids: Optional[List[int]] = None) -> Dict:
+        """
+        Get the economic modifier and supply disruption cost modifiers from the active events.
         
-        return event.intensity if event else 1.0
+        Args:
+            product_ids: Limit cost modifiers to these products (None = all products)
+        
+        Returns:
+            {"economic": intensity of the first active boom/recession (1.0 if none),
+             "cost": {product_id: intensity}} - products without a disruption are absent (1.0)
+        """
+        wanted = set(product_ids) if product_ids is not None else None
+        
+        economic = None
+        cost_modifiers = {}
+        for event in await self.get_active_events():
+            # Only the first active event counts, for the economy and for each product
+            if event.event_type == "SUPPLY_DISRUPTION":
+                if wanted is None or event.affected_product_id in wanted:
+                    cost_modifiers.setdefault(event.affected_product_id, event.intensity)
+            elif event.event_type in ("ECONOMIC_BOOM", "RECESSION") and economic is None:
+                economic = event.intensity
+        
+        return {
+            "economic": economic if economic is not None else 1.0,
+            "cost": cost_modifiers
+        }
     
     async def get_cost_modifier(self, product_id: int) -> float:
         """Get cost modifier for a specific product (from supply disruptions)."""
-        result = await self.db.execute(
-            select(MarketEvent)
-            .where(MarketEvent.event_type == "SUPPLY_DISRUPTION")
-            .where(MarketEvent.affected_product_id == product_id)
-            .where(MarketEvent.duration_months > 0)
-            .limit(1)  # Only get the first active disruption for this product
-        )
-        event = result.scalar_one_or_none()
-        
-        return event.intensity if event else 1.0
+        modifiers = await self.get_all_active_modifiers([product_id])
+        return modifiers["cost"].get(product_id, 1.0)
+    
+    async def get_all_cost_modifiers(self) -> Dict[int, float]:
+        """
+        Get cost modifiers for every product with an active supply disruption.
+        Returns: {product_id: intensity}; products without a disruption are absent (1.0).
+        """
+        modifiers = await self.get_all_active_modifiers()
+        return modifiers["cost"]
     
     async def apply_demand_modifiers(
         self, 
@@ -489,29 +542,35 @@ class MarketEventsEngine:
         Apply all active demand modifiers.
         Returns: (final_demand, modifiers_dict)
         """
-        seasonal = self.get_seasonal_modifier(product_name)
+        results = await self.apply_demand_modifiers_bulk({product_name: base_demand})
+        return results[product_name]
+    
+    async def apply_demand_modifiers_bulk(
+        self,
+        base_demands: Dict[str, float]
+    ) -> Dict[str, Tuple[float, Dict[str, float]]]:
+        """
+        Apply all active demand modifiers to several products, fetching the economic modifier once.
+        Returns: {product_name: (final_demand, modifiers_dict)}
+        """
         economic = await self.get_economic_modifier()
+        month_patterns = self.SEASONAL_PATTERNS.get(self.current_month, {})
         
-        final_demand = base_demand * seasonal * economic
-        
-        modifiers = {
-            "base": base_demand,
-            "seasonal": seasonal,
-            "economic": economic,
-            "final": final_demand
-        }
-        return final_demand, modifiers
+        results = {}
+        for product_name, base_demand in base_demands.items():
+            seasonal = month_patterns.get(product_name, 1.0)
+            final_demand = base_demand * seasonal * economic
+            results[product_name] = (final_demand, {
+                "base": base_demand,
+                "seasonal": seasonal,
+                "economic": economic,
+                "final": final_demand
+            })
+        return results
     
     def get_season_name(self) -> str:
         """Get the current season name for logging."""
-        if self.current_month in [3, 4, 5]:
-            return "Spring"
-        elif self.current_month in [6, 7, 8]:
-            return "Summer"
-        elif self.current_month in [9, 10, 11]:
-            return "Fall"
-        else:  # 12, 1, 2
-            return "Winter"
+        return SEASON_NAMES[self.current_month]
     
     async def trigger_decision_event(self) -> Optional[MarketEvent]:
         """
@@ -519,20 +578,23 @@ class MarketEventsEngine:
         Returns the created event or None if conditions not met.
         """
         # Only trigger if no active decision events
-        result = await self.db.execute(
-            select(MarketEvent)
-            .where(MarketEvent.requires_player_decision == True)
-            .where(MarketEvent.decision_made == False)
+        pending = await self.db.scalar(
+            select(
+                select(MarketEvent.id)
+                .where(MarketEvent.requires_player_decision == True)
+                .where(MarketEvent.decision_made == False)
+                .exists()
+            )
         )
-        if result.scalar_one_or_none():
+        if pending:
             return None  # Already have pending decision
         
         # 20% chance per turn
-        if random.random() > 0.20:
+        if self._rng.random() > 0.20:
             return None
         
         # Pick random event template
-        template = random.choice(DECISION_EVENT_TEMPLATES)
+        template = self._rng.choice(DECISION_EVENT_TEMPLATES)
         
         # Serialize choices to JSON
         event_data = {
@@ -564,6 +626,7 @@ class MarketEventsEngine:
         
         self.db.add(event)
         await self.db.flush()
+        self.invalidate_events_cache()
         return event
     
     async def apply_decision_effects(self, event: MarketEvent, choice_id: str, company_id: int) -> str:
@@ -631,7 +694,7 @@ class MarketEventsEngine:
         if "brand_risk" in effects:
             risk = effects["brand_risk"]
             # Roll for risk
-            if random.random() < risk:
+            if self._rng.random() < risk:
                 brand_damage = effects.get("brand_damage", -1.0)
                 old_brand = company.brand_equity
                 company.brand_equity += brand_damage
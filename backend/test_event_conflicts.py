@@ -90,6 +90,7 @@ async def test_event_conflicts():
         )
         session.add(boom)
         await session.commit()
+        events_engine.invalidate_events_cache()  # Added outside the engine
         
         active_events = await events_engine.get_active_events()
         print(f"✅ Active events: {len(active_events)}")
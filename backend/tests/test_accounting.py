@@ -2,7 +2,7 @@ import pytest
 import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
 from core.accounting import AccountingEngine
-from app.models import AccountType
+from app.models import AccountType, Company
 
 @pytest.mark.asyncio
 class TestAccountingEngine:
@@ -44,6 +44,43 @@ class TestAccountingEngine:
         assert cash_balance == 500.0
         assert revenue_balance == -500.0
 
+    async def test_create_transaction_without_commit(self, db_session: AsyncSession, test_company):
+        """Test that commit=False flushes the entries but leaves the transaction open."""
+        engine = AccountingEngine(db_session)
+        await engine.initialize_company_accounts(test_company.id)
+        
+        cash = await engine._get_account_by_code(test_company.id, "1000")
+        revenue = await engine._get_account_by_code(test_company.id, "4000")
+        cash_id = cash.id
+        
+        await engine.create_transaction(
+            test_company.id, "Pending Sale", [(cash.id, 250.0), (revenue.id, -250.0)], commit=False
+        )
+        
+        # Visible inside the open transaction...
+        assert await engine.get_account_balance(cash_id) == 250.0
+        
+        # ...but gone once it is rolled back
+        await db_session.rollback()
+        assert await engine.get_account_balance(cash_id) == 0.0
+
+    async def test_stage_transaction(self, db_session: AsyncSession, test_company):
+        """Test staged transactions are written with their entries at the next flush."""
+        engine = AccountingEngine(db_session)
+        await engine.initialize_company_accounts(test_company.id)
+        
+        cash = await engine._get_account_by_code(test_company.id, "1000")
+        revenue = await engine._get_account_by_code(test_company.id, "4000")
+        
+        for amount in (100.0, 200.0):
+            engine.stage_transaction(test_company.id, "Staged Sale", [(cash.id, amount), (revenue.id, -amount)])
+        
+        await db_session.flush()
+        assert await engine.get_account_balance(cash.id) == 300.0
+        
+        with pytest.raises(ValueError, match="Transaction doesn't balance"):
+            engine.stage_transaction(test_company.id, "Bad Tx", [(cash.id, 100.0)])
+
     async def test_create_transaction_unbalanced(self, db_session: AsyncSession, test_company):
         """Test that unbalanced transactions raise ValueError."""
         engine = AccountingEngine(db_session)
@@ -126,3 +163,53 @@ class TestAccountingEngine:
         # Net Income should be 1000 - 400 = 600
         net_income = await engine.get_monthly_net_income(test_company.id)
         assert net_income == 600.0
+
+    async def test_get_balances_for_accounts(self, db_session: AsyncSession, test_company):
+        """Test batched balances match per-account balances, with 0.0 for untouched accounts."""
+        engine = AccountingEngine(db_session)
+        accounts = await engine.initialize_company_accounts(test_company.id)
+        await engine.record_cash_investment(test_company.id, 750.0)
+        
+        balances = await engine.get_balances_for_accounts([acc.id for acc in accounts])
+        
+        assert len(balances) == len(accounts)
+        for acc in accounts:
+            assert balances[acc.id] == await engine.get_account_balance(acc.id)
+        assert sum(balances.values()) == 0.0
+
+    async def test_get_company_cashes(self, db_session: AsyncSession, test_company):
+        """Test batched cash lookup matches the single-company helper."""
+        engine = AccountingEngine(db_session)
+        other = Company(name="Other Co", is_player=False)
+        db_session.add(other)
+        await db_session.commit()
+        
+        await engine.initialize_company_accounts(test_company.id)
+        await engine.initialize_company_accounts(other.id)
+        await engine.record_cash_investment(test_company.id, 1234.0)
+        
+        cashes = await engine.get_company_cashes([test_company.id, other.id])
+        
+        assert cashes == {test_company.id: 1234.0, other.id: 0.0}
+        assert cashes[test_company.id] == await engine.get_company_cash(test_company.id)
+
+    async def test_get_all_company_financials(self, db_session: AsyncSession, test_company):
+        """Test batched ledger totals match the per-company helpers."""
+        engine = AccountingEngine(db_session)
+        await engine.initialize_company_accounts(test_company.id)
+        await engine.record_cash_investment(test_company.id, 5000.0)
+        
+        cash = await engine._get_account_by_code(test_company.id, "1000")
+        revenue = await engine._get_account_by_code(test_company.id, "4000")
+        expense = await engine._get_account_by_code(test_company.id, "5000")
+        
+        await engine.create_transaction(test_company.id, "Sale", [(cash.id, 1000.0), (revenue.id, -1000.0)])
+        await engine.create_transaction(test_company.id, "Cost", [(expense.id, 400.0), (cash.id, -400.0)])
+        
+        financials = await engine.get_all_company_financials()
+        totals = financials[test_company.id]
+        
+        assert totals["cash"] == await engine.get_company_cash(test_company.id) == 5600.0
+        assert totals["net_income"] == await engine.get_monthly_net_income(test_company.id) == 600.0
+        assert totals["revenue"] == 1000.0
+        assert totals["capital"] == 5000.0
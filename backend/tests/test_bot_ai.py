@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
+from sqlalchemy import select
 from core.bot_ai import BotAI, BotPersonality
+from core.inventory_manager import InventoryManager
 from app.models import Company, Product, InventoryItem, MarketHistory, CompanyProduct
 
 @pytest.mark.asyncio
@@ -26,6 +28,17 @@ class TestBotAI:
         assert bot_ai._get_personality(c1) == BotPersonality.PREMIUM
         assert bot_ai._get_personality(c2) == BotPersonality.BALANCED
 
+    async def test_seeded_variance_is_reproducible(self, db_session):
+        """Test that seeded bots draw the same price variance sequence."""
+        bot_a = BotAI(db_session, seed=42)
+        bot_b = BotAI(db_session, seed=42)
+        
+        draws_a = [bot_a._uniform(-0.05, 0.05) for _ in range(5)]
+        draws_b = [bot_b._uniform(-0.05, 0.05) for _ in range(5)]
+        
+        assert draws_a == draws_b
+        assert all(-0.05 <= d <= 0.05 for d in draws_a)
+
     async def test_calculate_inventory_cost(self, bot_ai, db_session, test_company, test_product):
         """Test WAC calculation."""
         # 1. No inventory -> Base Cost
@@ -343,8 +356,8 @@ class TestBotAI:
         # Cost Target = 50 * 1.3 = 65.
         # Should pick 65.
         
-        # Fix random seed? or patch random
-        with patch("random.uniform", return_value=0.0): # No variance
+        # Patch the bot's RNG so there is no variance
+        with patch.object(bot_ai, "_uniform", return_value=0.0): # No variance
             await bot_ai._adjust_pricing(test_company, BotPersonality.BALANCED, logs)
             
         await db_session.refresh(cp)
@@ -370,7 +383,7 @@ class TestBotAI:
         # target < 0.05.
         
         with patch.dict(bot_ai.personality_config, {BotPersonality.AGGRESSIVE: {"margin": 0.01, "marketing_budget": 0.1}}):
-             with patch("random.uniform", return_value=0.0):
+             with patch.object(bot_ai, "_uniform", return_value=0.0):
                 await bot_ai._adjust_pricing(test_company, BotPersonality.AGGRESSIVE, logs)
                 
         # Margin 1%. Min margin 5%.
@@ -399,7 +412,7 @@ class TestBotAI:
         
         # Reset logs
         del logs[:]
-        with patch("random.uniform", return_value=0.0):
+        with patch.object(bot_ai, "_uniform", return_value=0.0):
              await bot_ai._adjust_pricing(test_company, BotPersonality.BALANCED, logs)
              
         await db_session.refresh(cp)
@@ -409,19 +422,21 @@ class TestBotAI:
 
     @patch("core.inventory_manager.InventoryManager")
     @patch("core.engine.GameEngine")
-    async def test_manage_inventory_full_flow(self, MockGameEngine, MockInvMgr, bot_ai, db_session, test_company, test_product):
+    async def test_manage_inventory_full_flow(self, MockGameEngine, MockInvMgr, bot_ai, db_session, test_company, test_product, test_company_product):
         """Test inventory management purchasing logic."""
         logs = []
         
         # Setup Mocks
         mock_inv = MockInvMgr.return_value
-        mock_inv.calculate_safety_stock = AsyncMock(return_value=10)
-        mock_inv.get_reorder_quantity = AsyncMock(return_value=100)
-        mock_inv.forecast_demand = AsyncMock(return_value=50)
-        mock_inv.get_current_inventory = AsyncMock(return_value=0)
+        # Forecast 90 + safety 10 - stock 0 -> reorder 100
+        mock_inv.forecast_demand_bulk = AsyncMock(return_value={test_product.id: 90})
+        mock_inv.calculate_safety_stock_bulk = AsyncMock(return_value={test_product.id: 10})
+        mock_inv.get_current_inventory_bulk = AsyncMock(return_value={test_product.id: 0})
+        mock_inv.reorder_quantity = InventoryManager.reorder_quantity
         
         mock_engine = MockGameEngine.return_value
-        mock_engine.purchase_inventory = AsyncMock()
+        mock_engine.validate_purchase = AsyncMock()
+        mock_engine.purchase_inventory_batch = AsyncMock()
         
         # Give cash
         await bot_ai.accounting.initialize_company_accounts(test_company.id)
@@ -432,14 +447,109 @@ class TestBotAI:
         
         # Verify purchase called
         # Base cost 10.0. Qty 100. Cost 1000.
-        mock_engine.purchase_inventory.assert_awaited_with(
-            company_id=test_company.id,
-            product_id=test_product.id,
-            quantity=100,
-            unit_cost=10.0# Base cost of test_product default? Usually created in conftest
-        )
+        mock_engine.purchase_inventory_batch.assert_awaited_once()
+        assert mock_engine.purchase_inventory_batch.call_args.args[0] == [
+            (test_company.id, test_product.id, 100, 10.0)  # Base cost of test_product
+        ]
         assert "Purchase complete" in "".join(logs)
         
+    @patch("core.inventory_manager.InventoryManager")
+    @patch("core.engine.GameEngine")
+    async def test_manage_inventory_uses_turn_engine(self, MockGameEngine, MockInvMgr, db_session, test_company, test_product, test_company_product):
+        """Test purchases go through the turn's GameEngine (and its account cache) when one is given."""
+        mock_inv = MockInvMgr.return_value
+        mock_inv.forecast_demand_bulk = AsyncMock(return_value={test_product.id: 90})
+        mock_inv.calculate_safety_stock_bulk = AsyncMock(return_value={test_product.id: 10})
+        mock_inv.get_current_inventory_bulk = AsyncMock(return_value={test_product.id: 0})
+        mock_inv.reorder_quantity = InventoryManager.reorder_quantity
+
+        turn_engine = MagicMock()
+        turn_engine.validate_purchase = AsyncMock()
+        turn_engine.purchase_inventory_batch = AsyncMock()
+        bot_ai = BotAI(db_session, game_engine=turn_engine)
+        await bot_ai.accounting.initialize_company_accounts(test_company.id)
+        await bot_ai.accounting.record_cash_investment(test_company.id, 50000.0)
+
+        await bot_ai._manage_inventory(test_company, [])
+
+        turn_engine.purchase_inventory_batch.assert_awaited_once()
+        assert not MockGameEngine.called
+
+    @patch("core.inventory_manager.InventoryManager")
+    async def test_manage_inventory_failed_batch_rolls_back(self, MockInvMgr, bot_ai, db_session, test_company, test_product, test_company_product):
+        """Test a failed purchase batch is rolled back without losing earlier work in the turn."""
+        from core.engine import GameEngine
+
+        mock_inv = MockInvMgr.return_value
+        mock_inv.forecast_demand_bulk = AsyncMock(return_value={test_product.id: 90})
+        mock_inv.calculate_safety_stock_bulk = AsyncMock(return_value={test_product.id: 10})
+        mock_inv.get_current_inventory_bulk = AsyncMock(return_value={test_product.id: 0})
+        mock_inv.reorder_quantity = InventoryManager.reorder_quantity
+
+        await bot_ai.accounting.initialize_company_accounts(test_company.id)
+        await bot_ai.accounting.record_cash_investment(test_company.id, 50000.0)
+
+        # Earlier, uncommitted work in the same turn
+        test_company.brand_equity = 2.0
+        await db_session.flush()
+
+        real_batch = GameEngine.purchase_inventory_batch
+
+        async def failing_batch(engine, purchases, logs=None):
+            # Stage and flush the purchase, then fail
+            await real_batch(engine, purchases, logs)
+            raise RuntimeError("DB Boom")
+
+        logs = []
+        with patch.object(GameEngine, "purchase_inventory_batch", failing_batch):
+            await bot_ai._manage_inventory(test_company, logs)
+
+        assert f"Purchase failed: DB Boom (rolled back: {test_product.name})" in "".join(logs)
+        assert "Purchase complete" not in "".join(logs)
+        assert "WAC" not in "".join(logs)  # Lines from the undone batch are dropped
+        # The purchase is undone, the earlier work is not
+        assert await bot_ai.accounting.get_company_cash(test_company.id) == 50000.0
+        inv = await db_session.execute(
+            select(InventoryItem).where(InventoryItem.company_id == test_company.id)
+        )
+        assert inv.scalars().all() == []
+        assert (await db_session.get(Company, test_company.id)).brand_equity == 2.0
+
+    @patch("core.inventory_manager.InventoryManager")
+    async def test_manage_inventory_bad_line_skipped(self, MockInvMgr, bot_ai, db_session, test_company, test_product, test_company_product):
+        """Test one invalid purchase line is dropped while the rest of the batch goes through."""
+        bad_product = Product(name="Bad Widget", sku="BAD-WIDGET-001", base_cost=10.0, base_price=20.0)
+        db_session.add(bad_product)
+        await db_session.flush()
+        db_session.add(CompanyProduct(company_id=test_company.id, product_id=bad_product.id, price=20.0))
+        await db_session.flush()
+        product_ids = [test_product.id, bad_product.id]
+
+        mock_inv = MockInvMgr.return_value
+        mock_inv.forecast_demand_bulk = AsyncMock(return_value={pid: 90 for pid in product_ids})
+        mock_inv.calculate_safety_stock_bulk = AsyncMock(return_value={pid: 10 for pid in product_ids})
+        mock_inv.get_current_inventory_bulk = AsyncMock(return_value={pid: 0 for pid in product_ids})
+        mock_inv.reorder_quantity = InventoryManager.reorder_quantity
+
+        # A corrupt cost modifier gives the bad product a negative unit cost
+        events_engine = MagicMock()
+        events_engine.get_all_cost_modifiers = AsyncMock(return_value={bad_product.id: -1.0})
+
+        await bot_ai.accounting.initialize_company_accounts(test_company.id)
+        await bot_ai.accounting.record_cash_investment(test_company.id, 50000.0)
+
+        logs = []
+        await bot_ai._manage_inventory(test_company, logs, events_engine=events_engine)
+
+        assert "(skipped: Bad Widget)" in "".join(logs)
+        assert "Purchase complete" in "".join(logs)
+        # Only the good line was bought and paid for
+        assert await bot_ai.accounting.get_company_cash(test_company.id) == 49000.0
+        inv = await db_session.execute(
+            select(InventoryItem.product_id, InventoryItem.quantity).where(InventoryItem.company_id == test_company.id)
+        )
+        assert inv.all() == [(test_product.id, 100)]
+
     @patch("core.inventory_manager.InventoryManager")
     async def test_manage_inventory_low_cash(self, MockInvMgr, bot_ai, db_session, test_company):
         """Test skipping inventory when poor."""
@@ -454,18 +564,20 @@ class TestBotAI:
 
     @patch("core.inventory_manager.InventoryManager")
     @patch("core.engine.GameEngine")
-    async def test_manage_inventory_branches(self, MockGameEngine, MockInvMgr, bot_ai, db_session, test_company, test_product):
+    async def test_manage_inventory_branches(self, MockGameEngine, MockInvMgr, bot_ai, db_session, test_company, test_product, test_company_product):
         """Test specific branches in manage_inventory."""
         logs = []
         mock_inv = MockInvMgr.return_value
-        mock_inv.calculate_safety_stock = AsyncMock(return_value=10)
-        mock_inv.get_reorder_quantity = AsyncMock(return_value=100)
-        mock_inv.forecast_demand = AsyncMock(return_value=50)
-        mock_inv.get_current_inventory = AsyncMock(return_value=0)
+        # Forecast 90 + safety 10 - stock 0 -> reorder 100
+        mock_inv.forecast_demand_bulk = AsyncMock(return_value={test_product.id: 90})
+        mock_inv.calculate_safety_stock_bulk = AsyncMock(return_value={test_product.id: 10})
+        mock_inv.get_current_inventory_bulk = AsyncMock(return_value={test_product.id: 0})
+        mock_inv.reorder_quantity = InventoryManager.reorder_quantity
         
         mock_engine = MockGameEngine.return_value
         # Ensure it's an AsyncMock for proper access to methods
-        mock_engine.purchase_inventory = AsyncMock()
+        mock_engine.validate_purchase = AsyncMock()
+        mock_engine.purchase_inventory_batch = AsyncMock()
         
         await bot_ai.accounting.initialize_company_accounts(test_company.id)
         
@@ -483,54 +595,54 @@ class TestBotAI:
         
         await bot_ai._manage_inventory(test_company, logs)
         
-        mock_engine.purchase_inventory.assert_called()
-        call_args = mock_engine.purchase_inventory.call_args
-        assert call_args.kwargs['quantity'] == 110
+        mock_engine.purchase_inventory_batch.assert_called()
+        call_args = mock_engine.purchase_inventory_batch.call_args
+        assert call_args.args[0][0][2] == 110
 
         # 2. Event Cost Modifier Branch (lines 537-547)
         mock_events = MagicMock()
-        mock_events.get_cost_modifier = AsyncMock(return_value=1.5) # +50% cost
+        mock_events.get_all_cost_modifiers = AsyncMock(return_value={test_product.id: 1.5}) # +50% cost
         
-        mock_engine.purchase_inventory.reset_mock()
+        mock_engine.purchase_inventory_batch.reset_mock()
         logs = []
         await bot_ai._manage_inventory(test_company, logs, events_engine=mock_events)
         
         assert "Supply Chain Impact" in "".join(logs)
         assert "+50%" in "".join(logs)
-        mock_engine.purchase_inventory.assert_called()
-        assert mock_engine.purchase_inventory.call_args.kwargs['unit_cost'] == 15.0 # 10.0 * 1.5
+        mock_engine.purchase_inventory_batch.assert_called()
+        assert mock_engine.purchase_inventory_batch.call_args.args[0][0][3] == 15.0 # 10.0 * 1.5
 
         # 3. Skip Purchase Branch (viability=False) (lines 558-563)
-        mock_events.get_cost_modifier = AsyncMock(return_value=10.0) # 10x cost -> Viability Fail
-        mock_engine.purchase_inventory.reset_mock()
+        mock_events.get_all_cost_modifiers = AsyncMock(return_value={test_product.id: 10.0}) # 10x cost -> Viability Fail
+        mock_engine.purchase_inventory_batch.reset_mock()
         logs = []
         
         await bot_ai._manage_inventory(test_company, logs, events_engine=mock_events)
         assert "SKIPPING" in "".join(logs)
-        assert not mock_engine.purchase_inventory.called
+        assert not mock_engine.purchase_inventory_batch.called
 
         # 4. Not enough cash for 1 unit (lines 572-576)
-        mock_events.get_cost_modifier = AsyncMock(return_value=10000.0) # Cost 100k
+        mock_events.get_all_cost_modifiers = AsyncMock(return_value={test_product.id: 10000.0}) # Cost 100k
         # Force viability logic to PASS even with high cost, to hit "Not enough cash" block
         # We need to mock _evaluate_purchase_viability since it calls out
         with patch.object(bot_ai, '_evaluate_purchase_viability', return_value=(True, 1.0, "Force Pass")):
-             mock_engine.purchase_inventory.reset_mock()
+             mock_engine.purchase_inventory_batch.reset_mock()
              logs = []
              await bot_ai._manage_inventory(test_company, logs, events_engine=mock_events)
              assert "Not enough cash" in "".join(logs)
-             assert not mock_engine.purchase_inventory.called
+             assert not mock_engine.purchase_inventory_batch.called
 
         # 5. Exception handling (lines 614-617)
-        mock_events.get_cost_modifier = AsyncMock(return_value=1.0)
-        mock_engine.purchase_inventory.side_effect = Exception("DB Boom")
+        mock_events.get_all_cost_modifiers = AsyncMock(return_value={test_product.id: 1.0})
+        mock_engine.purchase_inventory_batch.side_effect = Exception("DB Boom")
         logs = []
         await bot_ai._manage_inventory(test_company, logs)
         assert "Purchase failed: DB Boom" in "".join(logs)
         
         # 6. No reorder needed (qty=0) (line 527)
-        mock_inv.get_reorder_quantity = AsyncMock(return_value=0)
+        mock_inv.forecast_demand_bulk = AsyncMock(return_value={test_product.id: 0})
         # Ensure calculated extra safety is also 0
-        mock_inv.calculate_safety_stock = AsyncMock(return_value=0)
+        mock_inv.calculate_safety_stock_bulk = AsyncMock(return_value={test_product.id: 0})
         test_company.strategy_memory = {} # Reset memory so no safety boost
         await db_session.commit()
         
@@ -79,6 +79,26 @@ class TestInventoryManager:
         expected = (500 * 3 + 400 * 2 + 300 * 1) / 6
         assert abs(forecast - expected) < 0.01
 
+    async def test_forecast_demand_limited_periods(self, inventory_manager, db_session, test_company, test_product):
+        """Test forecast_demand only weights the most recent periods_back periods."""
+        for i, demand in enumerate([300.0, 400.0, 500.0]):  # Oldest to newest
+            db_session.add(MarketHistory(
+                company_id=test_company.id,
+                product_id=test_product.id,
+                year=2024,
+                month=i + 1,
+                price=20.0,
+                demand_captured=demand,
+                units_sold=int(demand * 0.9),
+                revenue=demand * 20
+            ))
+        await db_session.commit()
+        
+        forecast = await inventory_manager.forecast_demand(test_company.id, test_product.id, periods_back=2)
+        
+        # Only [500, 400] count: (500*3 + 400*2) / 5 = 460
+        assert abs(forecast - 460.0) < 0.01
+
     async def test_forecast_demand_with_fewer_periods_than_requested(self, inventory_manager, db_session, test_company, test_product):
         """Test forecast_demand when less history exists than periods_back."""
         # Create only 2 periods of history
@@ -121,7 +141,9 @@ class TestInventoryManager:
         
         # Mock events engine
         mock_events = MagicMock()
-        mock_events.apply_demand_modifiers = AsyncMock(return_value=(500.0, {"seasonality": 1.25}))
+        mock_events.apply_demand_modifiers_bulk = AsyncMock(
+            side_effect=lambda base_demands: {name: (500.0, {"seasonality": 1.25}) for name in base_demands}
+        )
         
         forecast = await inventory_manager.forecast_demand(
             test_company.id, 
@@ -131,13 +153,13 @@ class TestInventoryManager:
         
         # Should return modified forecast
         assert forecast == 500.0
-        mock_events.apply_demand_modifiers.assert_awaited_once()
+        mock_events.apply_demand_modifiers_bulk.assert_awaited_once()
 
     async def test_forecast_demand_with_events_engine_no_product_name(self, inventory_manager, db_session, test_company):
         """Test forecast_demand with events_engine when product doesn't exist."""
         # Use non-existent product ID
         mock_events = MagicMock()
-        mock_events.apply_demand_modifiers = AsyncMock(return_value=(500.0, {}))
+        mock_events.apply_demand_modifiers_bulk = AsyncMock(return_value={})
         
         forecast = await inventory_manager.forecast_demand(
             test_company.id, 
@@ -147,7 +169,7 @@ class TestInventoryManager:
         
         # Should return default forecast without calling events engine
         assert forecast == 300.0
-        mock_events.apply_demand_modifiers.assert_not_awaited()
+        mock_events.apply_demand_modifiers_bulk.assert_not_awaited()
 
     async def test_calculate_safety_stock_insufficient_data(self, inventory_manager, db_session, test_company, test_product):
         """Test calculate_safety_stock with less than 2 data points."""
@@ -310,7 +332,9 @@ class TestInventoryManager:
         
         # Mock events engine that increases demand
         mock_events = MagicMock()
-        mock_events.apply_demand_modifiers = AsyncMock(return_value=(600.0, {"seasonality": 1.5}))
+        mock_events.apply_demand_modifiers_bulk = AsyncMock(
+            side_effect=lambda base_demands: {name: (600.0, {"seasonality": 1.5}) for name in base_demands}
+        )
         
         reorder_qty = await inventory_manager.get_reorder_quantity(
             test_company.id,
@@ -322,6 +346,44 @@ class TestInventoryManager:
         # Target = 680, Reorder = 680 - 100 = 580
         assert reorder_qty == 580
 
+    async def test_bulk_methods_match_single_product(self, inventory_manager, db_session, test_company, test_product):
+        """Test the bulk variants agree with the per-product methods."""
+        other = Product(sku="BULK-1", name="Bulk Product", base_cost=5.0, base_price=10.0)
+        db_session.add(other)
+        await db_session.commit()
+        
+        # test_product has three periods of history and some stock; other has neither
+        for i, demand in enumerate([300.0, 400.0, 500.0]):
+            db_session.add(MarketHistory(
+                company_id=test_company.id,
+                product_id=test_product.id,
+                year=2024,
+                month=i + 1,
+                price=20.0,
+                demand_captured=demand,
+                units_sold=int(demand * 0.9),
+                revenue=demand * 20
+            ))
+        db_session.add(InventoryItem(company_id=test_company.id, product_id=test_product.id, quantity=120))
+        await db_session.commit()
+        
+        product_ids = [test_product.id, other.id]
+        forecasts = await inventory_manager.forecast_demand_bulk(test_company.id, product_ids)
+        safety_stocks = await inventory_manager.calculate_safety_stock_bulk(test_company.id, product_ids)
+        inventories = await inventory_manager.get_current_inventory_bulk(test_company.id, product_ids)
+        reorders = await inventory_manager.get_reorder_quantities(test_company.id, product_ids)
+        
+        for product_id in product_ids:
+            assert forecasts[product_id] == await inventory_manager.forecast_demand(test_company.id, product_id)
+            assert safety_stocks[product_id] == await inventory_manager.calculate_safety_stock(test_company.id, product_id)
+            assert inventories[product_id] == await inventory_manager.get_current_inventory(test_company.id, product_id)
+            assert reorders[product_id] == await inventory_manager.get_reorder_quantity(test_company.id, product_id)
+        
+        # Partitioned per product: test_product's own weighted history, other falls back to 300
+        assert abs(forecasts[test_product.id] - 2600 / 6) < 0.01
+        assert forecasts[other.id] == 300.0
+        assert inventories[other.id] == 0
+
     async def test_calculate_turnover_with_sales_and_inventory(self, inventory_manager, db_session, test_company, test_product):
         """Test calculate_turnover with sales and inventory data."""
         # Create sales history
@@ -1,7 +1,7 @@
 import pytest
 import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
-from core.market import MarketEngine
+from core.market import MarketEngine, distribute_units
 from app.models import Product, CompanyProduct
 
 
@@ -18,6 +18,23 @@ class TestMarketEngine:
         
         assert 900 <= demand <= 1100
 
+    async def test_seeded_demand_is_reproducible(self, db_session: AsyncSession, test_product):
+        """Test engines built with the same seed draw the same demand."""
+        first = await MarketEngine(db_session, seed=7).calculate_market_demand(test_product.id)
+        second = await MarketEngine(db_session, seed=7).calculate_market_demand(test_product.id)
+        
+        assert first == second
+
+    async def test_product_name_cache(self, db_session: AsyncSession, test_product):
+        """Test the first name lookup loads every product name into the cache."""
+        engine = MarketEngine(db_session)
+        
+        assert await engine._get_product_name(test_product.id) == test_product.name
+        assert engine._product_names == {test_product.id: test_product.name}
+        
+        with pytest.raises(KeyError):
+            await engine._get_product_name(test_product.id + 999)
+
     async def test_distribute_sales_logic(
         self, 
         db_session: AsyncSession, 
@@ -292,3 +309,14 @@ class TestMarketEngine:
         assert "Missed Sales: 10 units" in log_str
         # And ensure no revenue logs
         assert "💵 Revenue:" not in log_str
+
+    async def test_distribute_units_kernel(self):
+        """Test the pure distribution kernel: cheaper and stronger brands win share."""
+        # Equal brands: the cheaper seller gets more units, order is preserved
+        units = distribute_units([10.0, 20.0], [1.0, 1.0], 900.0, 0.5)
+        assert len(units) == 2
+        assert units[0] > units[1]
+        
+        # Same price: doubling brand equity doubles the share
+        units = distribute_units([10.0, 10.0], [2.0, 1.0], 900.0, 0.5)
+        assert units == [600.0, 300.0]
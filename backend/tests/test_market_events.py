@@ -0,0 +1,161 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.market_events import MarketEventsEngine
+from app.models import MarketEvent
+
+
+@pytest.mark.asyncio
+class TestMarketEventsEngine:
+
+    async def test_get_all_cost_modifiers(self, db_session: AsyncSession, test_product):
+        """Test prefetched cost modifiers match the per-product lookup."""
+        engine = MarketEventsEngine(db_session, current_month=1, current_year=2024)
+
+        # Two active disruptions on the same product - only the first one counts
+        db_session.add(MarketEvent(event_type="SUPPLY_DISRUPTION", duration_months=2, intensity=1.2, affected_product_id=test_product.id))
+        db_session.add(MarketEvent(event_type="SUPPLY_DISRUPTION", duration_months=1, intensity=1.3, affected_product_id=test_product.id))
+        # Expired disruptions and non-supply events are ignored
+        db_session.add(MarketEvent(event_type="SUPPLY_DISRUPTION", duration_months=0, intensity=1.5, affected_product_id=999))
+        db_session.add(MarketEvent(event_type="ECONOMIC_BOOM", duration_months=3, intensity=1.25))
+        await db_session.commit()
+
+        modifiers = await engine.get_all_cost_modifiers()
+
+        assert modifiers == {test_product.id: 1.2}
+        assert modifiers[test_product.id] == await engine.get_cost_modifier(test_product.id)
+
+    async def test_get_all_active_modifiers(self, db_session: AsyncSession, test_product):
+        """Test economic and cost modifiers come back together, filtered to the requested products."""
+        engine = MarketEventsEngine(db_session, current_month=1, current_year=2024)
+
+        # No active events - neutral economy, no disruptions
+        assert await engine.get_all_active_modifiers([test_product.id]) == {"economic": 1.0, "cost": {}}
+
+        db_session.add(MarketEvent(event_type="RECESSION", duration_months=2, intensity=0.8))
+        db_session.add(MarketEvent(event_type="SUPPLY_DISRUPTION", duration_months=2, intensity=1.2, affected_product_id=test_product.id))
+        db_session.add(MarketEvent(event_type="SUPPLY_DISRUPTION", duration_months=2, intensity=1.5, affected_product_id=999))
+        await db_session.commit()
+
+        # Active events are cached per tick, so pick up the new ones with a fresh engine
+        engine = MarketEventsEngine(db_session, current_month=1, current_year=2024)
+        modifiers = await engine.get_all_active_modifiers([test_product.id])
+
+        assert modifiers == {"economic": 0.8, "cost": {test_product.id: 1.2}}
+        assert modifiers["economic"] == await engine.get_economic_modifier()
+        assert (await engine.get_all_active_modifiers())["cost"] == {test_product.id: 1.2, 999: 1.5}
+
+    async def test_apply_demand_modifiers_bulk(self, db_session: AsyncSession):
+        """Test bulk demand modifiers match the single-product path."""
+        # December: Widgets +15%, Gadgets -15%
+        engine = MarketEventsEngine(db_session, current_month=12, current_year=2024)
+        db_session.add(MarketEvent(event_type="ECONOMIC_BOOM", duration_months=2, intensity=1.2))
+        await db_session.commit()
+
+        results = await engine.apply_demand_modifiers_bulk({"Basic Widget": 1000.0, "Premium Gadget": 500.0})
+
+        assert results["Basic Widget"][0] == pytest.approx(1000.0 * 1.15 * 1.2)
+        assert results["Premium Gadget"][1] == {
+            "base": 500.0, "seasonal": 0.85, "economic": 1.2, "final": pytest.approx(500.0 * 0.85 * 1.2)
+        }
+        assert results["Basic Widget"] == await engine.apply_demand_modifiers(1000.0, "Basic Widget")
+
+    async def test_active_events_cached_until_events_change(self, db_session: AsyncSession):
+        """Test active events are queried once per tick and reloaded after durations are updated."""
+        engine = MarketEventsEngine(db_session, current_month=1, current_year=2024)
+        boom = MarketEvent(event_type="ECONOMIC_BOOM", duration_months=1, intensity=1.2)
+        db_session.add(boom)
+        await db_session.commit()
+
+        assert await engine.get_economic_modifier() == 1.2
+
+        # Added behind the engine's back - not seen until the cache is reset
+        db_session.add(MarketEvent(event_type="SUPPLY_DISRUPTION", duration_months=2, intensity=1.3, affected_product_id=1))
+        await db_session.commit()
+        assert await engine.get_all_cost_modifiers() == {}
+
+        # Cancelling an event during the tick takes effect immediately
+        await engine.cancel_events([boom], "test")
+        assert await engine.get_economic_modifier() == 1.0
+
+        engine.invalidate_events_cache()
+        assert await engine.get_all_cost_modifiers() == {1: 1.3}
+
+        # Aging the events reloads them too
+        await engine.update_event_durations()
+        assert await engine.get_all_cost_modifiers() == {1: 1.3}
+
+    async def test_update_event_durations(self, db_session: AsyncSession):
+        """Test active events age by one month and expired or cancelled events are removed."""
+        engine = MarketEventsEngine(db_session, current_month=1, current_year=2024)
+        lasting = MarketEvent(event_type="ECONOMIC_BOOM", duration_months=3, intensity=1.2)
+        expiring = MarketEvent(event_type="SUPPLY_DISRUPTION", duration_months=1, intensity=1.3, affected_product_id=1)
+        cancelled = MarketEvent(event_type="RECESSION", duration_months=2, intensity=0.8)
+        db_session.add_all([lasting, expiring, cancelled])
+        await db_session.commit()
+        await engine.cancel_events([cancelled], "test")
+
+        await engine.update_event_durations()
+
+        # Loaded objects are kept in sync with the bulk UPDATE
+        assert lasting.duration_months == 2
+        result = await db_session.execute(select(MarketEvent.id, MarketEvent.duration_months))
+        assert result.all() == [(lasting.id, 2)]
+
+    async def test_trigger_supply_disruption(self, db_session: AsyncSession, test_product):
+        """Test a supply disruption picks a product and names it in the description."""
+        engine = MarketEventsEngine(db_session, current_month=1, current_year=2024)
+
+        # Skip the economic roll (0.5 >= 0.25), take the supply roll (0.1 < 0.15)
+        with patch.object(engine._rng, "random", side_effect=[0.5, 0.1]):
+            new_events = await engine.trigger_random_events()
+
+        assert len(new_events) == 1
+        event = new_events[0]
+        assert event.event_type == "SUPPLY_DISRUPTION"
+        assert event.affected_product_id == test_product.id
+        assert test_product.name in event.description
+        # 1.20 reads as +20%, not the float-truncated +19%
+        assert {1.20: "+20%", 1.30: "+30%"}[event.intensity] in event.description
+        assert await engine.get_all_cost_modifiers() == {test_product.id: event.intensity}
+
+    async def test_trigger_decision_event_skipped_while_pending(self, db_session: AsyncSession):
+        """Test no new decision event is raised while earlier ones await a decision."""
+        engine = MarketEventsEngine(db_session, current_month=1, current_year=2024)
+        for _ in range(2):
+            db_session.add(MarketEvent(event_type="DECISION_EVENT", duration_months=1, requires_player_decision=True, decision_made=False))
+        await db_session.commit()
+
+        with patch.object(engine._rng, "random", return_value=0.0):
+            assert await engine.trigger_decision_event() is None
+
+    async def test_seeded_events_are_reproducible(self, db_session: AsyncSession, test_product):
+        """Test engines with the same seed roll the same events."""
+        rolls = []
+        for _ in range(2):
+            engine = MarketEventsEngine(db_session, current_month=1, current_year=2024, seed=7)
+            events = []
+            for _ in range(5):
+                events += await engine.trigger_random_events()
+            rolls.append([(e.event_type, e.duration_months, e.intensity, e.affected_product_id) for e in events])
+            await db_session.rollback()
+
+        assert rolls[0] == rolls[1]
+        assert rolls[0]  # The seed produces at least one event
+
+    async def test_get_season_name(self, db_session: AsyncSession):
+        """Test every month maps to its season."""
+        expected = {12: "Winter", 1: "Winter", 2: "Winter", 3: "Spring", 5: "Spring",
+                    6: "Summer", 8: "Summer", 9: "Fall", 11: "Fall"}
+        for month, season in expected.items():
+            assert MarketEventsEngine(db_session, current_month=month, current_year=2024).get_season_name() == season
+
+    async def test_intensity_level_index(self, db_session: AsyncSession):
+        """Test table intensities map to their level and off-table ones to the closest level."""
+        engine = MarketEventsEngine(db_session, current_month=1, current_year=2024)
+
+        assert engine._intensity_level_index("RECESSION", 0.76) == 1
+        assert engine._intensity_level_index("ECONOMIC_BOOM", 1.45) == 3
+        assert engine._intensity_level_index("RECESSION", 0.8) == 1  # Closest to 0.76
+        assert engine._intensity_level_index("ECONOMIC_BOOM", 1.18) == 0  # Closest to 1.15